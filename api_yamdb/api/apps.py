@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import (add_simulated_latency, check_idle_connections,
+                         mark_connections_released)
+
+        request_started.connect(check_idle_connections)
+        request_finished.connect(mark_connections_released)
+        if settings.DB_SIMULATED_LATENCY_MS:
+            connection_created.connect(add_simulated_latency)
@@ -0,0 +1,136 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+STALE_USER_KEY = 'auth:stale:{}'
+TOKEN_USER_CLAIMS = ('username', 'role')
+
+
+class StaleUsers:
+    """
+    Пользователи, сменившие роль или заблокированные/удалённые:
+    user_id -> время изменения. Общий кэш Django опрашивается
+    не чаще раза в ttl секунд на пользователя в каждом процессе.
+    """
+    max_entries = 10000
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}
+
+    def changed_at(self, user_id):
+        now = time.monotonic()
+        entry = self.entries.get(user_id)
+        if entry is None or entry[0] < now:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            entry = (now + self.ttl, cache.get(STALE_USER_KEY.format(user_id)))
+            self.entries[user_id] = entry
+        return entry[1]
+
+    def mark(self, user_id):
+        changed_at = time.time()
+        cache.set(
+            STALE_USER_KEY.format(user_id),
+            changed_at,
+            timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        )
+        self.entries[user_id] = (time.monotonic() + self.ttl, changed_at)
+
+
+stale_users = StaleUsers(settings.AUTH_STALE_USERS_TTL)
+
+
+class UserAccessCache:
+    """
+    Роли пользователей, загруженные из базы в этом процессе:
+    user_id -> (время загрузки, username, role, is_active).
+    Запись перестаёт действовать, когда stale_users отмечает
+    изменение пользователя позже её загрузки.
+    """
+    max_entries = 10000
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, user_id, changed_at):
+        entry = self.entries.get(user_id)
+        if entry is None or changed_at is not None and entry[0] <= changed_at:
+            return None
+        return entry[1:]
+
+    def set(self, user):
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[user.pk] = (
+            time.time(), user.username, user.role, user.is_active
+        )
+
+    def invalidate(self, user_id):
+        self.entries.pop(user_id, None)
+
+
+user_access = UserAccessCache()
+
+
+def issue_access_token(user):
+    token = AccessToken.for_user(user)
+    for claim in TOKEN_USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def build_user(pk, username, role):
+    user = User(pk=pk, username=username, role=role)
+    # Пользователь существует в базе: при сохранении объектов
+    # с этим автором не нужен INSERT или повторная загрузка.
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def build_token_user(validated_token):
+    return build_user(
+        validated_token[api_settings.USER_ID_CLAIM],
+        *(validated_token[claim] for claim in TOKEN_USER_CLAIMS)
+    )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Собирает пользователя из claims токена без запроса к базе.
+    Полная запись загружается только для токенов без claims
+    и для пользователей, изменённых после выдачи токена; роль
+    изменённого пользователя затем берётся из user_access.
+    """
+
+    def get_user(self, validated_token):
+        if not all(
+            claim in validated_token
+            for claim in (api_settings.USER_ID_CLAIM, *TOKEN_USER_CLAIMS)
+        ):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        changed_at = stale_users.changed_at(user_id)
+        if changed_at is None or validated_token['iat'] > changed_at:
+            return build_token_user(validated_token)
+        cached = user_access.get(user_id, changed_at)
+        if cached is None:
+            user = super().get_user(validated_token)
+            user_access.set(user)
+            return user
+        username, role, is_active = cached
+        if not is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return build_user(user_id, username, role)
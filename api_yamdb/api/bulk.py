@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.db import connections, transaction
+from rest_framework import exceptions, status
+
+from reviews.models import Category, Genre, Title
+
+from .cache import touch_collections
+from .serializers import TitleBulkItemSerializer, TitleReadSerializer
+
+NOT_FOUND_MESSAGE = 'Произведение не найдено'
+
+
+def check_items(items):
+    if not isinstance(items, list) or not items:
+        raise exceptions.ValidationError(
+            {'non_field_errors': ['Ожидается непустой список произведений']}
+        )
+    if len(items) > settings.API_BULK_MAX_ITEMS:
+        raise exceptions.ValidationError({'non_field_errors': [
+            f'Не больше {settings.API_BULK_MAX_ITEMS} произведений за запрос'
+        ]})
+
+
+def referenced_slugs(items, field):
+    slugs = set()
+    for item in items:
+        value = item.get(field) if isinstance(item, dict) else None
+        if isinstance(value, str):
+            slugs.add(value)
+        elif isinstance(value, list):
+            slugs.update(slug for slug in value if isinstance(slug, str))
+    return slugs
+
+
+def slug_context(items):
+    """По одному запросу на категории и жанры всего пакета."""
+    return {
+        'categories': Category.objects.in_bulk(
+            referenced_slugs(items, 'category'), field_name='slug'
+        ),
+        'genres': Genre.objects.in_bulk(
+            referenced_slugs(items, 'genre'), field_name='slug'
+        ),
+    }
+
+
+class TitleBulkWriter:
+    """
+    Пакетное создание и частичное обновление произведений.
+    Ошибки возвращаются для каждого элемента отдельно, с atomic=True
+    любая ошибка отменяет весь пакет. Запись идёт bulk-запросами,
+    сигналы моделей не отправляются, кэш сбрасывается явно.
+    """
+
+    def __init__(self, items, atomic=False):
+        check_items(items)
+        self.items = items
+        self.atomic = atomic
+        self.results = [None] * len(items)
+
+    def fail(self, index, errors, code=status.HTTP_400_BAD_REQUEST):
+        self.results[index] = {'status': code, 'errors': errors}
+
+    def validate(self, instances=None):
+        """Список (индекс, произведение, жанры или None) для записи."""
+        context = slug_context(self.items)
+        valid = []
+        for index, item in enumerate(self.items):
+            if self.results[index] is not None:
+                continue
+            instance = None if instances is None else instances.get(index)
+            if instances is not None and instance is None:
+                self.fail(index, {'id': [NOT_FOUND_MESSAGE]},
+                          status.HTTP_404_NOT_FOUND)
+                continue
+            serializer = TitleBulkItemSerializer(
+                instance, data=item, partial=instance is not None,
+                context=context
+            )
+            if not serializer.is_valid():
+                self.fail(index, serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            genres = data.pop('genre', None)
+            title = instance or Title()
+            for field, value in data.items():
+                setattr(title, field, value)
+            valid.append((index, title, genres, set(data)))
+        return valid
+
+    @property
+    def failed(self):
+        return any(result is not None for result in self.results)
+
+    def create(self):
+        valid = self.validate()
+        if not valid or self.atomic and self.failed:
+            return self.response()
+        titles = [title for _, title, _, _ in valid]
+        features = connections[Title.objects.db].features
+        with transaction.atomic():
+            if features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(titles)
+            else:
+                # SQLite не возвращает id из bulk_create.
+                for title in titles:
+                    title.save()
+            self.set_genres(valid)
+            touch_collections('titles', 'leaderboards')
+        return self.response(valid, status.HTTP_201_CREATED)
+
+    def update(self):
+        ids = {}
+        for index, item in enumerate(self.items):
+            if isinstance(item, dict) and isinstance(item.get('id'), int):
+                ids[index] = item['id']
+            else:
+                self.fail(index, {'id': ['Обязательное поле.']})
+        titles = Title.objects.in_bulk(ids.values())
+        instances = {
+            index: titles[pk] for index, pk in ids.items() if pk in titles
+        }
+        valid = self.validate(instances)
+        if not valid or self.atomic and self.failed:
+            return self.response()
+        fields = set().union(*(changed for _, _, _, changed in valid))
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(
+                    [title for _, title, _, _ in valid], sorted(fields)
+                )
+            self.set_genres(valid, replace=True)
+            touch_collections('titles', 'leaderboards')
+        return self.response(valid, status.HTTP_200_OK)
+
+    def set_genres(self, valid, replace=False):
+        through = Title.genre.through
+        entries = [
+            (title, genres) for _, title, genres, _ in valid
+            if genres is not None
+        ]
+        if replace and entries:
+            through.objects.filter(
+                title_id__in=[title.pk for title, _ in entries]
+            ).delete()
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title, genres in entries
+            for genre in set(genres)
+        )
+
+    def response(self, valid=(), code=None):
+        """Итоговый статус и результаты в порядке элементов запроса."""
+        if self.atomic and self.failed or not valid:
+            return status.HTTP_400_BAD_REQUEST, self.results
+        overall = status.HTTP_207_MULTI_STATUS if self.failed else code
+        titles = Title.objects.with_relations().in_bulk(
+            [title.pk for _, title, _, _ in valid]
+        )
+        for index, title, _, _ in valid:
+            self.results[index] = {
+                'status': code,
+                'data': TitleReadSerializer(titles[title.pk]).data,
+            }
+        return overall, self.results
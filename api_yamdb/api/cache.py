@@ -0,0 +1,157 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+from rest_framework.response import Response
+
+from .db import read_from_replica
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}:{}'
+WRITTEN_KEY = 'api:written:{}'
+
+
+def get_collection_version(namespace):
+    """Версия коллекции - время её последнего изменения."""
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = time.time()
+        if not cache.add(key, version, timeout=None):
+            return cache.get(key, version)
+    return version
+
+
+def touch_collections(*namespaces):
+    """Сбрасывает закэшированные ответы коллекций сменой их версий."""
+    def touch():
+        now = time.time()
+        cache.set_many(
+            {VERSION_KEY.format(namespace): now for namespace in namespaces},
+            timeout=None
+        )
+        if settings.DATABASE_REPLICAS:
+            cache.set_many(
+                {WRITTEN_KEY.format(namespace): now
+                 for namespace in namespaces},
+                timeout=settings.DB_READ_YOUR_WRITES_WINDOW
+            )
+    touch()
+    # Повторно после коммита, чтобы не закэшировать данные,
+    # прочитанные конкурентным запросом до завершения транзакции.
+    transaction.on_commit(touch)
+
+
+def read_primary_after_writes(namespaces):
+    """
+    Пока реплики могут отставать от записи в коллекции, запрос
+    читает из основной базы: иначе устаревшие данные с реплики
+    закешируются или получат ETag под уже новой версией
+    и продержатся до следующей правки.
+    """
+    if settings.DATABASE_REPLICAS and cache.get_many(
+        [WRITTEN_KEY.format(namespace) for namespace in namespaces]
+    ):
+        read_from_replica.set(False)
+
+
+def get_versions(namespaces):
+    return [get_collection_version(namespace) for namespace in namespaces]
+
+
+def request_fingerprint(request, versions, *extra):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return hashlib.md5(
+        '|'.join(map(str, (request.path, query, *versions, *extra))).encode()
+    ).hexdigest()
+
+
+class CollectionVersionMixin:
+    """Версии коллекций, от которых зависит ответ представления."""
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+
+class CachedResponseMixin(CollectionVersionMixin):
+    """
+    Кэширует ответы list.
+    Ключ зависит от пути, параметров запроса и версий коллекций
+    из cache_namespaces, которые меняются сигналами моделей.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_RESPONSES:
+            return handler(request, *args, **kwargs)
+        namespaces = self.get_cache_namespaces()
+        read_primary_after_writes(namespaces)
+        key = RESPONSE_KEY.format(
+            '.'.join(namespaces),
+            request_fingerprint(request, get_versions(namespaces))
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Кэширует также ответы retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(CollectionVersionMixin):
+    """
+    ETag и Last-Modified для list и retrieve по версиям коллекций.
+    На совпавший If-None-Match/If-Modified-Since отвечает 304
+    без обращения к базе и сериализации. Как и кеш ответов,
+    работает только с общим кешем (API_CACHE_RESPONSES).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_RESPONSES:
+            return handler(request, *args, **kwargs)
+        namespaces = self.get_cache_namespaces()
+        read_primary_after_writes(namespaces)
+        versions = get_versions(namespaces)
+        etag = quote_etag(request_fingerprint(
+            request, versions, request.accepted_media_type
+        ))
+        # HTTP-дата в секундах не должна быть раньше самого изменения.
+        last_modified = math.ceil(max(versions))
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,115 @@
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PIN_KEY = 'db:pin:{}'
+
+# Можно ли текущему запросу читать с реплики.
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def check_idle_connections(**kwargs):
+    """
+    Проверка постоянных соединений перед запросом.
+    Соединение, простоявшее дольше DB_HEALTH_CHECK_IDLE секунд,
+    проверяется SELECT 1 и закрывается, если сервер его оборвал.
+    Горячие соединения под нагрузкой не проверяются.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if (
+            connection.connection is None
+            or not connection.settings_dict.get('DB_HEALTH_CHECKS')
+            or connection.in_atomic_block
+        ):
+            continue
+        idle = now - getattr(connection, 'last_released', now)
+        if idle < settings.DB_HEALTH_CHECK_IDLE:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def mark_connections_released(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_released = now
+
+
+def simulate_latency(execute, sql, params, many, context):
+    time.sleep(settings.DB_SIMULATED_LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+def add_simulated_latency(sender, connection, **kwargs):
+    """
+    Задержка каждого запроса на DB_SIMULATED_LATENCY_MS для замеров
+    на SQLite, как будто база находится по сети.
+    """
+    # В начало списка: execute_wrapper() снимает обёртки с конца.
+    if simulate_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, simulate_latency)
+
+
+class ReplicaRouter:
+    """
+    Чтения безопасных запросов уходят на случайную реплику
+    из DATABASE_REPLICAS, всё остальное - в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and read_from_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def get_pin_key(request):
+    # Анонимный клиент - по IP, как в троттлинге: за nginx REMOTE_ADDR
+    # один на всех, адрес клиента берётся из X-Forwarded-For.
+    client = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or BaseThrottle().get_ident(request)
+    )
+    return PIN_KEY.format(hashlib.md5(client.encode()).hexdigest())
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для GET/HEAD/OPTIONS. После пишущего
+    запроса клиент на DB_READ_YOUR_WRITES_WINDOW секунд закрепляется
+    за основной базой, чтобы видеть свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = get_pin_key(request)
+        safe = request.method in SAFE_METHODS
+        token = read_from_replica.set(safe and not cache.get(key))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if not safe:
+            cache.set(key, True, settings.DB_READ_YOUR_WRITES_WINDOW)
+        return response
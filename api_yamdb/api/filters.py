@@ -1,4 +1,6 @@
+from django.db.models import F
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
 
@@ -8,7 +10,41 @@ class TitleFilter(filters.FilterSet):
     genre = filters.CharFilter(field_name='genre__slug')
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
     year = filters.NumberFilter(field_name='year')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'year', 'name')
+        fields = ('category', 'genre', 'year', 'name', 'search')
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    ?ordering=-rating,name по публичным именам полей.
+    id в конце делает порядок одинаковым от страницы к странице.
+    Произведения без рейтинга идут последними в обоих направлениях,
+    как в индексах с NULLS LAST.
+    """
+    ordering_fields = ('rating', 'year', 'name', 'reviews_count')
+    field_aliases = {'reviews_count': 'review_count'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        terms = []
+        for term in ordering:
+            descending = term.startswith('-')
+            field = term.lstrip('-')
+            field = self.field_aliases.get(field, field)
+            if queryset.model._meta.get_field(field).null:
+                expression = F(field)
+                terms.append(
+                    expression.desc(nulls_last=True) if descending
+                    else expression.asc(nulls_last=True)
+                )
+            else:
+                terms.append(('-' if descending else '') + field)
+        return [*terms, 'id']
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from reviews.models import Title
+
+from .cache import get_collection_version, read_primary_after_writes
+
+LEADERBOARD_KEY = 'api:leaderboard:{}:{}'
+SCOPES_KEY = 'api:leaderboard:{}:scopes'
+# Лидерборд по всем произведениям, в slug категории '*' не бывает.
+ALL_TITLES = '*'
+
+
+def board_keys(scope):
+    version = get_collection_version('leaderboards')
+    return LEADERBOARD_KEY.format(version, scope), SCOPES_KEY.format(version)
+
+
+def sort_key(entry):
+    rating, title_id = entry
+    return -rating, title_id
+
+
+def build_leaderboard(scope):
+    # Рейтинги меняются отзывами, которые версию лидербордов не трогают.
+    read_primary_after_writes(('leaderboards', 'ratings'))
+    size = settings.API_LEADERBOARD_SIZE
+    titles = Title.objects.filter(rating__isnull=False)
+    if scope != ALL_TITLES:
+        titles = titles.filter(category__slug=scope)
+    entries = list(
+        # Порядок как у индексов title_rating_idx и title_category_rating_idx.
+        titles.order_by(
+            F('rating').desc(nulls_last=True), 'id'
+        ).values_list('rating', 'id')[:size + 1]
+    )
+    board = {'entries': entries[:size], 'exhaustive': len(entries) <= size}
+    key, scopes_key = board_keys(scope)
+    cache.set(key, board, settings.API_CACHE_TIMEOUT)
+    cache.set(
+        scopes_key, cache.get(scopes_key, set()) | {scope},
+        settings.API_CACHE_TIMEOUT
+    )
+    return board
+
+
+def get_leaderboard(scope, limit):
+    """
+    id лучших по рейтингу произведений, не больше limit.
+    Лидерборд хранит первые API_LEADERBOARD_SIZE мест; exhaustive
+    означает, что других произведений с рейтингом нет.
+    """
+    limit = min(limit, settings.API_LEADERBOARD_SIZE)
+    board = cache.get(board_keys(scope)[0])
+    if board is None or (
+        len(board['entries']) < limit and not board['exhaustive']
+    ):
+        board = build_leaderboard(scope)
+    return [title_id for _, title_id in board['entries'][:limit]]
+
+
+def update_leaderboards(title_id):
+    """
+    Переставляет произведение в закэшированных лидербордах после
+    смены рейтинга, не перестраивая их. Без лидербордов в кэше
+    не делает ни одного запроса.
+    """
+    scopes = cache.get(board_keys(ALL_TITLES)[1])
+    if not scopes:
+        return
+    title = Title.objects.filter(pk=title_id).values(
+        'rating', 'category__slug'
+    ).first()
+    for scope in scopes & {ALL_TITLES, title and title['category__slug']}:
+        key = board_keys(scope)[0]
+        board = cache.get(key)
+        if board is None:
+            continue
+        entries = [
+            entry for entry in board['entries'] if entry[1] != title_id
+        ]
+        if title and title['rating'] is not None:
+            entry = (title['rating'], title_id)
+            # Место известно, если произведение выше последнего в
+            # лидерборде или в нём все произведения с рейтингом.
+            if board['exhaustive'] or (
+                entries and sort_key(entry) < sort_key(entries[-1])
+            ):
+                entries = sorted([*entries, entry], key=sort_key)
+        size = settings.API_LEADERBOARD_SIZE
+        cache.set(key, {
+            'entries': entries[:size],
+            'exhaustive': board['exhaustive'] and len(entries) <= size,
+        }, settings.API_CACHE_TIMEOUT)
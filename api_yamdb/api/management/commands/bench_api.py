@@ -0,0 +1,143 @@
+import json
+import time
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.metrics import percentile
+from reviews.models import Review, Title
+
+
+def endpoints():
+    """Имя -> функция, выполняющая один запрос к API."""
+    title = Title.objects.order_by('-review_count', 'id').first()
+    review = Review.objects.filter(
+        title=title
+    ).order_by('pub_date', 'id').first()
+    if title is None or review is None:
+        raise CommandError(
+            'Benchmark needs data: run seed_bench or importdata first'
+        )
+    reviews = f'/api/v1/titles/{title.pk}/reviews/'
+    signups = count()
+
+    def signup(client):
+        username = f'bench_signup_{next(signups)}'
+        return client.post('/api/v1/auth/signup/', {
+            'username': username,
+            'email': f'{username}@bench.local',
+        })
+
+    return {
+        'titles_list': lambda client: client.get('/api/v1/titles/'),
+        'titles_by_category': lambda client: client.get(
+            '/api/v1/titles/', {'category': title.category.slug}
+        ) if title.category else client.get('/api/v1/titles/'),
+        'title_detail': lambda client: client.get(
+            f'/api/v1/titles/{title.pk}/'
+        ),
+        'reviews_first_page': lambda client: client.get(reviews),
+        'reviews_deep_offset': lambda client: client.get(
+            reviews, {'offset': max(title.review_count - 10, 0)}
+        ),
+        'reviews_cursor': lambda client: client.get(
+            reviews, {'pagination': 'cursor'}
+        ),
+        'comments_list': lambda client: client.get(
+            f'{reviews}{review.pk}/comments/'
+        ),
+        'signup': signup,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives the API endpoints through the test client and reports '
+        'latency percentiles and query counts as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Requests per endpoint',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            help='Only run the given endpoint, may be repeated',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear the cache before every request',
+        )
+        parser.add_argument(
+            '--throttle',
+            action='store_true',
+            help='Keep API_THROTTLE_RATES, e.g. to time rejected signups',
+        )
+        parser.add_argument('--output', help='Write the report to a file')
+
+    def handle(self, *args, **options):
+        selected = endpoints()
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - set(selected)
+            if unknown:
+                raise CommandError(f'Unknown endpoints: {sorted(unknown)}')
+            selected = {
+                name: request for name, request in selected.items()
+                if name in options['endpoints']
+            }
+        client = Client()
+        report = {}
+        # Все запросы идут с одного адреса и без лимитов упёрлись бы в 429.
+        rates = settings.API_THROTTLE_RATES if options['throttle'] else {}
+        with override_settings(API_THROTTLE_RATES=rates):
+            for name, request in selected.items():
+                report[name] = self.measure(
+                    client, request, options['requests'], options['cold']
+                )
+                self.stderr.write(
+                    f'{name}: p50 {report[name]["p50_ms"]} ms, '
+                    f'{report[name]["queries_max"]} queries'
+                )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def measure(self, client, request, requests, cold):
+        timings, queries, statuses = [], [], {}
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            # Пишущие запросы откатываются, чтобы не менять набор данных.
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request(client)
+                    timings.append((time.perf_counter() - started) * 1000)
+                transaction.set_rollback(True)
+            queries.append(len(captured))
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1
+            )
+        return {
+            'requests': requests,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries_p50': percentile(queries, 50),
+            'queries_max': max(queries),
+            'status_codes': statuses,
+        }
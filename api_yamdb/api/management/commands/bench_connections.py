@@ -0,0 +1,54 @@
+import json
+import time
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from api.metrics import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares a query on a fresh database connection with the same '
+        'query on a persistent one'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        report = {
+            'new_connection': self.measure(
+                connection, options['requests'], reconnect=True
+            ),
+            'persistent_connection': self.measure(
+                connection, options['requests'], reconnect=False
+            ),
+        }
+        report['setup_overhead_ms'] = round(
+            report['new_connection']['p50_ms']
+            - report['persistent_connection']['p50_ms'],
+            3
+        )
+        self.stdout.write(json.dumps(report, indent=2))
+
+    @staticmethod
+    def measure(connection, requests, reconnect):
+        timings = []
+        connection.ensure_connection()
+        for _ in range(requests):
+            if reconnect:
+                connection.close()
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'requests': requests,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+        }
@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from api.metrics import percentile
+
+MODES = ('wsgi', 'wsgi-gthread', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts one gunicorn worker in WSGI, threaded WSGI and ASGI mode '
+        'and compares their throughput under concurrent load'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--path', default='/api/v1/titles/',
+                            help='Endpoint to load, e.g. a reviews list')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds of load per mode')
+        parser.add_argument(
+            '--threads',
+            '--asgi-threads',
+            type=int,
+            default=32,
+            help='Threads of the ASGI pool and of the wsgi-gthread worker, '
+                 'so both modes overlap the same number of requests',
+        )
+        parser.add_argument(
+            '--db-latency',
+            type=float,
+            default=0,
+            help='Milliseconds added to every query, to stand in for a '
+                 'remote database when benchmarking on SQLite',
+        )
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--output', help='Also write the report here')
+
+    def handle(self, *args, **options):
+        report = {}
+        for mode in options['modes']:
+            server = self.start_server(mode, options)
+            try:
+                report[mode] = self.load(
+                    f'http://127.0.0.1:{options["port"]}{options["path"]}',
+                    options['concurrency'], options['duration']
+                )
+            finally:
+                server.terminate()
+                server.wait()
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def start_server(self, mode, options):
+        threaded = mode == 'wsgi-gthread'
+        env = {
+            **os.environ,
+            'GUNICORN_SERVER_MODE': 'asgi' if mode == 'asgi' else 'wsgi',
+            'GUNICORN_WORKER_CLASS': 'gthread' if threaded else 'sync',
+            'GUNICORN_WORKERS': '1',
+            'GUNICORN_THREADS': str(options['threads'] if threaded else 1),
+            'GUNICORN_BIND': f'127.0.0.1:{options["port"]}',
+            'ASGI_WORKER_THREADS': str(options['threads']),
+            'DB_SIMULATED_LATENCY_MS': str(options['db_latency']),
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{options["port"]}{options["path"]}'
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn in {mode} mode failed to start')
+            try:
+                urllib.request.urlopen(url, timeout=5).read()
+                return server
+            except (URLError, ConnectionError):
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'gunicorn in {mode} mode did not answer')
+
+    @staticmethod
+    def load(url, concurrency, duration):
+        deadline = time.monotonic() + duration
+
+        def client():
+            timings, errors = [], 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    urllib.request.urlopen(url, timeout=30).read()
+                except (URLError, ConnectionError):
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings, errors
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda _: client(), range(concurrency)
+            ))
+        timings = [value for result, _ in results for value in result]
+        if not timings:
+            raise CommandError(f'No successful requests to {url}')
+        return {
+            'requests': len(timings),
+            'errors': sum(errors for _, errors in results),
+            'requests_per_sec': round(len(timings) / duration, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
@@ -0,0 +1,73 @@
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self):
+        cumulative, total = {}, 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class MetricsRegistry:
+    """
+    Гистограммы и счётчики по имени представления.
+    Хранятся в памяти процесса: каждый воркер gunicorn отдаёт свои.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, metric, view, value, buckets):
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                (metric, view), Histogram(buckets)
+            )
+            histogram.observe(value)
+
+    def increment(self, metric, view, amount=1):
+        with self.lock:
+            key = (metric, view)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            views = {}
+            for (metric, view), histogram in self.histograms.items():
+                views.setdefault(view, {})[metric] = histogram.as_dict()
+            for (metric, view), value in self.counters.items():
+                views.setdefault(view, {})[metric] = value
+            return views
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+registry = MetricsRegistry()
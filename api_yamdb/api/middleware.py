@@ -0,0 +1,121 @@
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import LATENCY_BUCKETS_MS, QUERY_BUCKETS, SIZE_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+# Время сериализации запроса, см. api.serializers.TimedModelSerializer.
+serialization_timer = ContextVar('serialization_timer', default=None)
+
+
+class QueryBudgetExceededError(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class Stopwatch:
+    def __init__(self):
+        self.duration = 0.0
+
+
+def get_query_budget(request, view_name):
+    budgets = settings.API_QUERY_BUDGETS
+    return budgets.get(
+        f'{request.method} {view_name}',
+        budgets.get(view_name, settings.API_QUERY_BUDGET_DEFAULT)
+    )
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы, время в базе, время сериализации и рендеринга
+    ответа и его размер для каждого представления. Отдаёт их в Server-Timing,
+    копит гистограммы в metrics.registry и проверяет бюджет запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        serialization = Stopwatch()
+        token = serialization_timer.set(serialization)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = self.get_response(request)
+        finally:
+            serialization_timer.reset(token)
+        total = time.perf_counter() - started
+
+        if request.resolver_match is None:
+            return response
+        view_name = request.resolver_match.view_name
+        render = getattr(request, '_render_duration', 0.0)
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"',
+            f'serialize;dur={serialization.duration * 1000:.1f}',
+            f'render;dur={render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        for metric, value, buckets in (
+            ('duration_ms', total * 1000, LATENCY_BUCKETS_MS),
+            ('db_duration_ms', counter.duration * 1000, LATENCY_BUCKETS_MS),
+            ('serialize_duration_ms', serialization.duration * 1000,
+             LATENCY_BUCKETS_MS),
+            ('render_duration_ms', render * 1000, LATENCY_BUCKETS_MS),
+            ('queries', counter.count, QUERY_BUCKETS),
+            ('response_bytes', size, SIZE_BUCKETS),
+        ):
+            if value is not None:
+                registry.observe(metric, view_name, value, buckets)
+        self.check_budget(request, view_name, counter.count)
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после представления: засекаем рендеринг
+        # (JSON уже сериализованных данных).
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def check_budget(request, view_name, queries):
+        budget = get_query_budget(request, view_name)
+        if budget is None or queries <= budget:
+            return
+        registry.increment('query_budget_exceeded', view_name)
+        message = (
+            f'{request.method} {view_name} made {queries} queries, '
+            f'budget is {budget}'
+        )
+        if settings.API_QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceededError(message)
+        logger.warning(message)
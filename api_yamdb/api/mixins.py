@@ -1,8 +1,36 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import mixins, viewsets
 
+from reviews.models import Review, Title
+
 
 class CustomViewSet(mixins.CreateModelMixin,
                     mixins.ListModelMixin,
                     mixins.DestroyModelMixin,
                     viewsets.GenericViewSet):
     pass
+
+
+class NestedParentMixin:
+    """
+    Родительские объекты из вложенных URL загружаются один раз
+    за запрос и кэшируются на представлении.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_review(self):
+        # Отзыв ищется сразу с произведением из URL, чтобы не отдавать
+        # комментарии по чужому title_id.
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.only('id', 'title'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
@@ -0,0 +1,38 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ('pub_date', 'id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class FeedPagination(LimitOffsetPagination):
+    """
+    Пагинация лент отзывов и комментариев.
+    По умолчанию limit/offset, с параметром pagination=cursor
+    (или при переданном cursor) - курсорная по (pub_date, id).
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
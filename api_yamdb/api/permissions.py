@@ -32,7 +32,8 @@ class IsStaffOrAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            # author_id не требует загрузки автора из базы.
+            or obj.author_id == request.user.pk
             or request.user.is_moderator
             or request.user.is_admin
         )
@@ -1,21 +1,50 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
 from rest_framework import exceptions, serializers
 from rest_framework.relations import SlugRelatedField
 
 from reviews.models import Category, Comment, Genre, Review, Title
 
+from .middleware import serialization_timer
+
 User = get_user_model()
 
+UNIQUE_REVIEW_MESSAGE = 'Может существовать только один отзыв'
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """
+    Время сериализации ответа для Server-Timing и /metrics/.
+    Засекается верхний сериализатор или элементы верхнего списка,
+    вложенные сериализаторы входят в их время.
+    """
+
+    def to_representation(self, instance):
+        timer = serialization_timer.get()
+        parent = self.parent
+        if timer is None or parent is not None and not (
+            isinstance(parent, serializers.ListSerializer)
+            and parent.parent is None
+        ):
+            return super().to_representation(instance)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timer.duration += time.perf_counter() - started
+
 
-class UserForAdminSerializer(serializers.ModelSerializer):
+class UserForAdminSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email', 'first_name', 'last_name', 'bio',
                   'role')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email', 'first_name', 'last_name', 'bio',
@@ -54,28 +83,38 @@ class SignUpSerializer(serializers.ModelSerializer):
         fields = ('email', 'username')
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedModelSerializer):
     class Meta:
         model = Category
         exclude = ('id',)
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     class Meta:
         model = Genre
         exclude = ('id',)
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(TimedModelSerializer):
     genre = GenreSerializer(read_only=True, many=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True, required=False)
+    reviews_count = serializers.IntegerField(
+        source='review_count', read_only=True
+    )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum', 'review_count', 'search_vector')
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.API_LEADERBOARD_SIZE, default=10
+    )
 
 
 class TitleWriteSerializer(TitleReadSerializer):
@@ -90,7 +129,37 @@ class TitleWriteSerializer(TitleReadSerializer):
     )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Произведение из пакета /titles/bulk/. Slug-и ищутся в словарях
+    context['categories'] и context['genres'], загруженных разом
+    для всего пакета, а не отдельным запросом на каждое поле.
+    """
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
+    def resolve(self, objects, slug):
+        try:
+            return objects[slug]
+        except KeyError:
+            raise exceptions.ValidationError(
+                SlugRelatedField.default_error_messages[
+                    'does_not_exist'
+                ].format(slug_name='slug', value=slug)
+            )
+
+    def validate_category(self, value):
+        return self.resolve(self.context['categories'], value)
+
+    def validate_genre(self, value):
+        return [self.resolve(self.context['genres'], slug) for slug in value]
+
+
+class ReviewSerializer(TimedModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
@@ -98,22 +167,18 @@ class ReviewSerializer(serializers.ModelSerializer):
         exclude = ('title', )
         read_only_fields = ('id',)
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title = get_object_or_404(
-            Title,
-            pk=self.context.get('view').kwargs.get('title_id')
-        )
-        if (request.method == 'POST'
-           and Review.objects.filter(title=title, author=author).exists()):
+    def create(self, validated_data):
+        # Один отзыв на автора гарантирует ограничение unique_review.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
             raise exceptions.ValidationError(
-                {'title': 'Может существовать только один отзыв'}
+                {'title': [UNIQUE_REVIEW_MESSAGE]}
             )
-        return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
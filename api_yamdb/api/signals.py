@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+from .authentication import stale_users, user_access
+from .cache import touch_collections
+from .leaderboard import update_leaderboards
+
+
+@receiver([post_save, post_delete], sender=Category)
+def touch_categories(sender, **kwargs):
+    touch_collections('categories', 'titles')
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def touch_genres(sender, **kwargs):
+    touch_collections('genres', 'titles')
+
+
+@receiver([post_save, post_delete], sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles(sender, **kwargs):
+    # Правка произведения может сменить его категорию,
+    # лидерборды проще построить заново.
+    touch_collections('titles', 'leaderboards')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def touch_reviews(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг одного произведения: его страницу и списки,
+    # где рейтинг выводится. Закэшированные страницы остальных
+    # произведений остаются.
+    touch_collections(
+        'ratings', f'title:{instance.title_id}',
+        f'reviews:{instance.title_id}'
+    )
+    update_leaderboards(instance.title_id)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def touch_comments(sender, instance, **kwargs):
+    # Комментарий меняет comments_count отзыва. Через review.comments
+    # отзыв уже подставлен в instance, лишнего запроса нет.
+    touch_collections(
+        f'comments:{instance.review_id}',
+        f'reviews:{instance.review.title_id}'
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_users(sender, instance, created, **kwargs):
+    # Отзывы и комментарии выводят username автора, поэтому версия
+    # меняется только при смене имени: регистрации её не трогают.
+    if not created and instance.username_changed:
+        touch_collections('users')
+    instance._loaded_username = instance.username
+
+
+@receiver(post_delete, sender=get_user_model())
+def touch_deleted_users(sender, **kwargs):
+    touch_collections('users')
+
+
+@receiver(post_save, sender=get_user_model())
+def mark_changed_access(sender, instance, created, **kwargs):
+    # Токены, выданные до смены роли, больше не принимаются на веру.
+    if instance.access_changed:
+        stale_users.mark(instance.pk)
+        user_access.invalidate(instance.pk)
+    instance._loaded_access = (instance.role, instance.is_active)
+
+
+@receiver(post_delete, sender=get_user_model())
+def mark_deleted_user(sender, instance, **kwargs):
+    stale_users.mark(instance.pk)
+    user_access.invalidate(instance.pk)
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from api_yamdb.asgi import ThreadPoolWsgiToAsgi, application
+
+HTTP_SCOPE = {
+    'type': 'http',
+    'http_version': '1.1',
+    'method': 'GET',
+    'path': '/api/v1/',
+    'query_string': b'',
+    'headers': [(b'host', b'testserver')],
+    'server': ('testserver', 80),
+}
+
+
+def run(scope, messages, app=application):
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[:]
+
+
+class AsgiApplicationTest(SimpleTestCase):
+
+    def test_lifespan(self):
+        sent = run({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    def test_http_request_runs_django(self):
+        sent = run(HTTP_SCOPE, [{'type': 'http.request', 'body': b''}])
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(b'titles', b''.join(
+            message.get('body', b'') for message in sent[1:]
+        ))
+
+    def test_requests_run_in_the_thread_pool(self):
+        threads = []
+
+        def wsgi_application(environ, start_response):
+            threads.append(threading.current_thread().name)
+            start_response('200 OK', [])
+            return [b'']
+
+        sent = run(
+            HTTP_SCOPE, [{'type': 'http.request', 'body': b''}],
+            app=ThreadPoolWsgiToAsgi(wsgi_application),
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(threads[0].startswith('asgi'), threads)
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from api.authentication import (StatelessJWTAuthentication, issue_access_token,
+                                stale_users, user_access)
+from api.permissions import IsStaffOrAuthorOrReadOnly
+from reviews.models import Review
+from users.models import ADMIN, MODERATOR
+
+User = get_user_model()
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        stale_users.entries.clear()
+        user_access.entries.clear()
+        self.user = User.objects.create(username='user', email='u@ya.ru')
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def authenticate(self):
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {issue_access_token(self.user)}'
+        )
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        return user
+
+    def test_user_is_built_from_claims(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'user'))
+        self.assertFalse(user.is_admin)
+
+    def test_role_change_invalidates_claims(self):
+        token = issue_access_token(self.user)
+        self.user.role = MODERATOR
+        self.user.save()
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        with self.assertNumQueries(1):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertTrue(user.is_moderator)
+
+    def test_changed_role_is_cached_per_process(self):
+        token = issue_access_token(self.user)
+        self.user.role = MODERATOR
+        self.user.save()
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        with self.assertNumQueries(1):
+            StatelessJWTAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertTrue(user.is_moderator)
+
+        self.user.role = ADMIN
+        self.user.save()
+        with self.assertNumQueries(1):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertTrue(user.is_admin)
+
+    def test_author_permission_does_not_load_author(self):
+        review = Review(author_id=self.user.pk)
+        request = APIRequestFactory().patch('/')
+        request.user = self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                IsStaffOrAuthorOrReadOnly().has_object_permission(
+                    request, None, review
+                )
+            )
+
+    def test_deactivated_user_is_rejected(self):
+        token = issue_access_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        with self.assertRaises(AuthenticationFailed):
+            StatelessJWTAuthentication().authenticate(request)
+
+    def test_token_user_can_write(self):
+        self.user.role = ADMIN
+        self.user.save()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {issue_access_token(self.user)}'
+        )
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'film'}
+        )
+        self.assertEqual(response.status_code, 201)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'u@ya.ru')
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Genre, Title
+from users.models import ADMIN
+
+User = get_user_model()
+
+URL = '/api/v1/titles/bulk/'
+
+
+class TitleBulkTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=ADMIN
+        )
+        cls.film = Category.objects.create(name='Фильм', slug='film')
+        cls.book = Category.objects.create(name='Книга', slug='book')
+        for slug in ('drama', 'comedy'):
+            Genre.objects.create(name=slug, slug=slug)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def items(self, count):
+        return [
+            {'name': f'Произведение {i}', 'year': 2000,
+             'category': 'film', 'genre': ['drama', 'comedy']}
+            for i in range(count)
+        ]
+
+    def test_slugs_are_resolved_once_per_model(self):
+        # Категории и жанры, вставка, связи с жанрами и ответ -
+        # постоянное число запросов, только произведения на SQLite
+        # вставляются по одному, так как bulk_create не вернёт их id.
+        for count in (1, 20):
+            with self.subTest(count=count), self.assertNumQueries(7 + count):
+                response = self.client.post(
+                    URL, self.items(count), format='json'
+                )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Title.genre.through.objects.count(), 42)
+
+    def test_per_item_errors(self):
+        items = self.items(3)
+        items[1]['category'] = 'unknown'
+        items[2]['year'] = 'год'
+        response = self.client.post(URL, items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.data], [201, 400, 400]
+        )
+        self.assertIn('category', response.data[1]['errors'])
+        self.assertEqual(
+            response.data[0]['data']['category']['slug'], 'film'
+        )
+        self.assertEqual(Title.objects.count(), 1)
+
+    def test_atomic_batch_is_aborted(self):
+        items = self.items(2)
+        items[1]['genre'] = ['unknown']
+        response = self.client.post(f'{URL}?atomic=true', items,
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Title.objects.exists())
+
+    def test_bulk_partial_update(self):
+        self.client.post(URL, self.items(2), format='json')
+        first, second = Title.objects.order_by('id')
+        response = self.client.patch(URL, [
+            {'id': first.pk, 'category': 'book', 'genre': ['comedy']},
+            {'id': second.pk, 'name': 'Новое'},
+            {'id': 0, 'name': 'Нет такого'},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.data], [200, 200, 404]
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.category, self.book)
+        self.assertEqual(
+            list(first.genre.values_list('slug', flat=True)), ['comedy']
+        )
+        self.assertEqual((second.name, second.genre.count()), ('Новое', 2))
+
+    def test_bulk_requires_admin(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(URL, self.items(1), format='json')
+        self.assertEqual(response.status_code, 401)
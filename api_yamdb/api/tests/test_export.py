@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import ADMIN
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='a@ya.ru', role=ADMIN
+        )
+        category = Category.objects.create(name='Фильм', slug='film')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title = Title.objects.create(
+            name='Побег', year=1994, category=category,
+            description='Описание, с запятой'
+        )
+        self.title.genre.set([genre])
+        review = Review.objects.create(
+            title=self.title, author=self.admin, text='Ок', score=9
+        )
+        Comment.objects.create(review=review, author=self.admin, text='Да')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(
+            self.content(response).splitlines(),
+            ['id,name,year,description,category',
+             f'{self.title.pk},Побег,1994,"Описание, с запятой",'
+             f'{self.title.category_id}']
+        )
+
+    def test_ndjson_export(self):
+        response = self.client.get(
+            '/api/v1/export/review/', {'output': 'ndjson'}
+        )
+        row = json.loads(self.content(response))
+        self.assertEqual(
+            (row['title_id'], row['author'], row['score']),
+            (self.title.pk, self.admin.pk, 9)
+        )
+
+    def test_export_is_admin_only(self):
+        self.client.force_authenticate(
+            User.objects.create(username='user', email='u@ya.ru')
+        )
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_dataset_and_output(self):
+        response = self.client.get('/api/v1/export/secrets/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            '/api/v1/export/titles/', {'output': 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_round_trips_through_importdata(self):
+        def snapshot():
+            return (
+                list(Title.objects.values_list(
+                    'id', 'name', 'description', 'category__slug',
+                    'genre__slug', 'rating'
+                )),
+                list(Review.objects.values_list('id', 'text', 'pub_date')),
+                list(Comment.objects.values_list(
+                    'id', 'review__title_id', 'author__username', 'text',
+                    'pub_date'
+                )),
+            )
+
+        Title.objects.create(name='Без описания', year=2000)
+        Review.objects.update(
+            pub_date=datetime(2019, 9, 24, 21, 8, 21, tzinfo=timezone.utc)
+        )
+        expected = snapshot()
+        with tempfile.TemporaryDirectory() as path:
+            call_command('exportdata', path=path, stdout=StringIO())
+            self.assertTrue(os.path.exists(os.path.join(path, 'users.csv')))
+            for model in (Comment, Review, Title, Genre, Category, User):
+                model.objects.all().delete()
+            call_command('importdata', path=path, stdout=StringIO())
+        self.assertEqual(snapshot(), expected)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, Title
+
+User = get_user_model()
+
+
+class FeedQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@ya.ru')
+            for i in range(100)
+        )
+        users = User.objects.order_by('pk')
+        Review.objects.bulk_create(
+            Review(title=cls.title, author=user, text='Отзыв', score=5)
+            for user in users
+        )
+        cls.review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(review=cls.review, author=user, text='Комментарий')
+            for user in users
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_feed_queries(self, url, queries):
+        for limit in (10, 100):
+            with self.subTest(limit=limit), self.assertNumQueries(queries):
+                response = self.client.get(url, {'limit': limit})
+            self.assertEqual(len(response.data['results']), limit)
+            self.assertTrue(response.data['results'][-1]['author'])
+
+    def test_reviews_feed(self):
+        self.assert_feed_queries(
+            f'/api/v1/titles/{self.title.pk}/reviews/', 3
+        )
+
+    def test_comments_feed(self):
+        self.assert_feed_queries(
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+            f'{self.review.pk}/comments/',
+            3
+        )
+
+    def test_comments_require_matching_title(self):
+        other = Title.objects.create(name='Другое', year=2001)
+        response = self.client.get(
+            f'/api/v1/titles/{other.pk}/reviews/{self.review.pk}/comments/'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.metrics import registry
+from api.middleware import QueryBudgetExceededError
+from reviews.models import Title
+from users.models import ADMIN
+
+User = get_user_model()
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Title.objects.create(name='Произведение', year=2000)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'db;dur=[\d.]+;desc="3 queries", serialize;dur=[\d.]+, '
+            r'render;dur=[\d.]+, '
+            r'total;dur=[\d.]+'
+        )
+
+    @override_settings(
+        API_QUERY_BUDGETS={'GET api:titles-list': 2},
+        API_QUERY_BUDGET_RAISE=True
+    )
+    def test_exceeded_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceededError):
+            self.client.get('/api/v1/titles/')
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/v1/titles/')
+        self.client.get('/api/v1/titles/')
+        self.client.force_authenticate(
+            User.objects.create(username='admin', email='a@ya.ru', role=ADMIN)
+        )
+        metrics = self.client.get('/api/v1/metrics/').data['api:titles-list']
+        self.assertEqual(metrics['duration_ms']['count'], 2)
+        self.assertEqual(metrics['serialize_duration_ms']['count'], 2)
+        # Повторный запрос отдан из кэша без обращения к базе.
+        self.assertEqual(metrics['queries']['buckets']['0'], 1)
+        self.assertEqual(metrics['queries']['buckets']['3'], 2)
@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review, Title
+
+User = get_user_model()
+
+
+class TitleRatingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'user{i}@ya.ru')
+            for i in range(3)
+        ]
+
+    def assert_rating(self, score_sum, review_count, rating):
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count, self.title.rating),
+            (score_sum, review_count, rating)
+        )
+
+    def test_counters_follow_review_writes(self):
+        first, second, _ = self.users
+        review = Review.objects.create(
+            title=self.title, author=first, score=4
+        )
+        self.assert_rating(4, 1, 4)
+        Review.objects.create(title=self.title, author=second, score=10)
+        self.assert_rating(14, 2, 7)
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 8
+        review.save()
+        self.assert_rating(18, 2, 9)
+
+        review.delete()
+        self.assert_rating(10, 1, 10)
+        Review.objects.get().delete()
+        self.assert_rating(0, 0, None)
+
+    def test_half_average_rounds_the_same_on_both_paths(self):
+        # 6.5: инкрементальный UPDATE и ROUND(AVG()) округляют от нуля.
+        for user, score in zip(self.users, (6, 7)):
+            Review.objects.create(title=self.title, author=user, score=score)
+        self.assert_rating(13, 2, 7)
+        call_command('recompute_ratings', stdout=StringIO())
+        self.assert_rating(13, 2, 7)
+
+    def test_title_save_keeps_counters(self):
+        title = Title.objects.get(pk=self.title.pk)
+        Review.objects.create(title=self.title, author=self.users[0], score=6)
+        title.name = 'Переименовано'
+        title.save()
+        self.assert_rating(6, 1, 6)
+        self.assertEqual(self.title.name, 'Переименовано')
+
+    def test_recompute_ratings_command(self):
+        for user, score in zip(self.users, (2, 3, 9)):
+            Review.objects.create(title=self.title, author=user, score=score)
+        Title.objects.update(score_sum=0, review_count=0, rating=None)
+        call_command('recompute_ratings', stdout=StringIO())
+        self.assert_rating(14, 3, 5)
+
+
+class CountersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.user = User.objects.create(username='user', email='u@ya.ru')
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, score=5
+        )
+
+    def test_comments_count_follows_comment_writes(self):
+        comments = [
+            Comment.objects.create(review=self.review, author=self.user,
+                                   text=str(i))
+            for i in range(3)
+        ]
+        comments[0].delete()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comments_count, 2)
+
+    def test_review_save_keeps_comments_count(self):
+        # Как в ReviewViewSet: счётчик загружен до конкурентной записи.
+        review = Review.objects.only('text', 'comments_count').get(
+            pk=self.review.pk
+        )
+        Comment.objects.create(review=self.review, author=self.user, text='')
+        review.text = 'Исправлено'
+        review.save()
+        self.review.refresh_from_db()
+        self.assertEqual(
+            (self.review.text, self.review.comments_count), ('Исправлено', 1)
+        )
+
+    def test_counters_are_exposed(self):
+        Comment.objects.create(review=self.review, author=self.user, text='')
+        client = APIClient()
+        response = client.get(f'/api/v1/titles/{self.title.pk}/')
+        self.assertEqual(response.data['reviews_count'], 1)
+        response = client.get(f'/api/v1/titles/{self.title.pk}/reviews/')
+        self.assertEqual(response.data['results'][0]['comments_count'], 1)
+
+    def test_title_delete_cascades(self):
+        Comment.objects.create(review=self.review, author=self.user, text='')
+        self.title.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reconcile_counters_command(self):
+        Comment.objects.create(review=self.review, author=self.user, text='')
+        Title.objects.update(review_count=7)
+        Review.objects.update(comments_count=0)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('Title: 1 drifted', out.getvalue())
+        self.assertIn('Review: 1 drifted', out.getvalue())
+        self.title.refresh_from_db()
+        self.review.refresh_from_db()
+        self.assertEqual(
+            (self.title.review_count, self.review.comments_count), (1, 1)
+        )
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('Title: 0 drifted', out.getvalue())
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.db import ReplicaRoutingMiddleware
+from reviews.models import Category, Title
+
+User = get_user_model()
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, DB_READ_YOUR_WRITES_WINDOW=5)
+class ReplicaRoutingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.read_alias)
+
+    def read_alias(self, request):
+        # Запрос не выполняется: проверяется только выбор базы роутером.
+        self.alias = Title.objects.all().db
+        return HttpResponse()
+
+    def call(self, method, **extra):
+        self.middleware(getattr(self.factory, method)('/', **extra))
+        return self.alias
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertIn(self.call('get'), REPLICAS)
+        self.assertIn(self.call('head'), REPLICAS)
+
+    def test_writes_use_primary(self):
+        self.assertEqual(self.call('post'), 'default')
+
+    def test_client_is_pinned_after_write(self):
+        self.call('patch', HTTP_AUTHORIZATION='Bearer first')
+        self.assertEqual(
+            self.call('get', HTTP_AUTHORIZATION='Bearer first'), 'default'
+        )
+        self.assertIn(
+            self.call('get', HTTP_AUTHORIZATION='Bearer second'), REPLICAS
+        )
+
+    def test_anonymous_clients_are_pinned_by_forwarded_ip(self):
+        # За nginx REMOTE_ADDR у всех клиентов один и тот же.
+        self.call('post', HTTP_X_FORWARDED_FOR='192.0.2.1')
+        self.assertEqual(
+            self.call('get', HTTP_X_FORWARDED_FOR='192.0.2.1'), 'default'
+        )
+        self.assertIn(
+            self.call('get', HTTP_X_FORWARDED_FOR='192.0.2.2'), REPLICAS
+        )
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(Title.objects.all().db, 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        self.assertEqual(self.call('get'), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, DB_READ_YOUR_WRITES_WINDOW=5)
+class ReplicaReadsTest(TestCase):
+    """
+    Реплики - отдельные базы SQLite в памяти со своими данными:
+    по ответу видно, из какой базы он прочитан.
+    """
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        for alias in REPLICAS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            }
+            with connections[alias].schema_editor() as editor:
+                editor.create_model(Category)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections.databases[alias]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin'
+        )
+        Category.objects.create(name='Основная', slug='primary')
+        for alias in REPLICAS:
+            Category.objects.using(alias).create(name='Реплика', slug=alias)
+
+    def setUp(self):
+        cache.clear()
+        self.reader = APIClient(REMOTE_ADDR='10.0.0.2')
+
+    def category_names(self, client):
+        response = client.get('/api/v1/categories/')
+        return {category['name'] for category in response.data['results']}
+
+    def test_reads_are_served_by_replica(self):
+        self.assertEqual(self.category_names(self.reader), {'Реплика'})
+
+    def test_reads_after_write_are_served_by_primary(self):
+        writer = APIClient()
+        writer.force_authenticate(self.admin)
+        response = writer.post(
+            '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}
+        )
+        self.assertEqual(response.status_code, 201)
+        # Другой клиент не закреплён за основной базой, но ответ
+        # с отстающей реплики попал бы в кеш под новой версией.
+        self.assertEqual(
+            self.category_names(self.reader), {'Основная', 'Новая'}
+        )
+        # Окно отставания прошло: чтения снова идут на реплику.
+        cache.clear()
+        self.assertEqual(self.category_names(self.reader), {'Реплика'})
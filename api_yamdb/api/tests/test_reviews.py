@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Review, Title
+
+User = get_user_model()
+
+
+class ReviewFeedTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title,
+                author=User.objects.create(
+                    username=f'user{i}', email=f'user{i}@ya.ru'
+                ),
+                text=f'Отзыв {i}',
+                score=5,
+            )
+            for i in range(5)
+        ]
+        cls.url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_offset_pagination_is_default(self):
+        response = self.client.get(self.url, {'limit': 2, 'offset': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(
+            [review['id'] for review in response.data['results']],
+            [review.pk for review in self.reviews[2:4]]
+        )
+
+    def test_cursor_pagination_walks_all_pages(self):
+        ids = []
+        response = self.client.get(
+            self.url, {'pagination': 'cursor', 'limit': 2}
+        )
+        self.assertNotIn('count', response.data)
+        while True:
+            ids.extend(review['id'] for review in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(ids, [review.pk for review in self.reviews])
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        review = self.reviews[0]
+        review.text = 'Изменённый отзыв'
+        review.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_users_keep_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        User.objects.create(username='newcomer', email='new@ya.ru')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        author = User.objects.get(pk=self.reviews[0].author_id)
+        author.bio = 'Критик'
+        author.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        author.username = 'renamed'
+        author.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['author'], 'renamed')
+
+
+class ReviewCreateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.user = User.objects.create(username='author', email='a@ya.ru')
+        cls.url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_loads_title_once(self):
+        # SELECT title, SAVEPOINT, INSERT, UPDATE рейтинга, RELEASE.
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, {'text': 'Да', 'score': 7})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['author'], self.user.username)
+
+    def test_second_review_is_rejected(self):
+        self.client.post(self.url, {'text': 'Да', 'score': 7})
+        response = self.client.post(self.url, {'text': 'Нет', 'score': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'title': ['Может существовать только один отзыв']}
+        )
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating, 7)
+
+    def test_update_score(self):
+        response = self.client.post(self.url, {'text': 'Да', 'score': 7})
+        response = self.client.patch(
+            f'{self.url}{response.data["id"]}/', {'score': 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.score_sum, self.title.rating), (3, 3))
+
+    def test_unknown_title(self):
+        response = self.client.post(
+            '/api/v1/titles/0/reviews/', {'text': 'Да', 'score': 7}
+        )
+        self.assertEqual(response.status_code, 404)
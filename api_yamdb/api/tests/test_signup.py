@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import FAILED, PENDING, SENT, OutgoingEmail
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP не отвечает')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('Соединение не открыто')
+
+
+class CrashingEmailBackend(BaseEmailBackend):
+    """Доставляет первое письмо, а на втором воркер падает."""
+
+    def send_messages(self, email_messages):
+        if mail.outbox:
+            raise SystemExit('Воркер остановлен')
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+class SignupMailQueueTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def signup(self):
+        return self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'new_user', 'email': 'new_user@ya.ru'}
+        )
+
+    def test_signup_enqueues_confirmation_code(self):
+        response = self.signup()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutgoingEmail.objects.get()
+        self.assertEqual(message.status, PENDING)
+
+        call_command('send_queued_mail', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new_user@ya.ru'])
+        message.refresh_from_db()
+        self.assertEqual(message.status, SENT)
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_signup.FailingEmailBackend'
+    )
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.signup()
+        call_command('send_queued_mail', stdout=StringIO())
+        message = OutgoingEmail.objects.get()
+        self.assertEqual((message.status, message.attempts), (PENDING, 1))
+        self.assertIn('SMTP', message.last_error)
+        self.assertFalse(OutgoingEmail.objects.due().exists())
+
+        OutgoingEmail.objects.update(send_after=message.created)
+        call_command(
+            'send_queued_mail', '--max-attempts=2', stdout=StringIO()
+        )
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (FAILED, 2))
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_signup.UnreachableEmailBackend'
+    )
+    def test_batch_is_rescheduled_when_connection_fails(self):
+        self.signup()
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('Sent 0 of 1', out.getvalue())
+        message = OutgoingEmail.objects.get()
+        self.assertEqual((message.status, message.attempts), (PENDING, 1))
+        self.assertIn('SMTP не отвечает', message.last_error)
+        self.assertFalse(OutgoingEmail.objects.due().exists())
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_signup.CrashingEmailBackend'
+    )
+    def test_worker_crash_does_not_resend_delivered_mail(self):
+        for number in range(2):
+            OutgoingEmail.objects.enqueue(
+                'Код', 'Текст', 'admin@example.com', f'user{number}@ya.ru'
+            )
+        with self.assertRaises(SystemExit):
+            call_command('send_queued_mail', stdout=StringIO())
+        delivered, claimed = OutgoingEmail.objects.order_by('id')
+        self.assertEqual(delivered.status, SENT)
+        self.assertEqual((claimed.status, claimed.attempts), (PENDING, 1))
+        self.assertFalse(OutgoingEmail.objects.due().exists())
+
+        OutgoingEmail.objects.update(send_after=claimed.created)
+        mail.outbox.clear()
+        call_command('send_queued_mail', stdout=StringIO())
+        self.assertEqual(
+            [message.to for message in mail.outbox], [['user1@ya.ru']]
+        )
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.metrics import registry
+from api.throttling import CacheBucketStore, stores, take_token
+
+RATES = {
+    'signup:ip': ('1/min', 3),
+    'signup:identity': ('1/hour', 1),
+    'token:identity': ('1/hour', 2),
+}
+
+
+@override_settings(
+    API_THROTTLE_RATES=RATES,
+    API_THROTTLE_STORE='api.throttling.LocalBucketStore',
+)
+class AuthThrottleTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        stores.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def signup(self, name):
+        return self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': name, 'email': f'{name}@ya.ru'}
+        )
+
+    def test_identity_bucket(self):
+        self.assertEqual(self.signup('first').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.signup('first')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 3000)
+        self.assertEqual(
+            registry.snapshot()['api:signup']['throttled_identity'], 1
+        )
+
+    def test_ip_bucket(self):
+        for name in ('first', 'second', 'third'):
+            self.assertEqual(self.signup(name).status_code, 200)
+        response = self.signup('fourth')
+        self.assertEqual(response.status_code, 429)
+        self.assertLessEqual(int(response['Retry-After']), 60)
+        self.assertEqual(registry.snapshot()['api:signup']['throttled_ip'], 1)
+
+    def test_forwarded_for_rotation_shares_ip_bucket(self):
+        for i, expected in enumerate((200, 200, 200, 429)):
+            response = self.client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'user{i}', 'email': f'user{i}@ya.ru'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 192.0.2.1'
+            )
+            self.assertEqual(response.status_code, expected)
+
+    def test_token_endpoint_is_throttled_by_username(self):
+        for expected in (404, 404, 429):
+            response = self.client.post(
+                '/api/v1/auth/token/',
+                {'username': 'Ghost', 'confirmation_code': 'code'}
+            )
+            self.assertEqual(response.status_code, expected)
+
+
+class TokenBucketTest(SimpleTestCase):
+
+    def test_bucket_refills_over_time(self):
+        state, allowed = take_token(None, 2, 0.5, now=100)
+        self.assertEqual((state, allowed), ((1, 100), True))
+        state, allowed = take_token(state, 2, 0.5, now=100)
+        self.assertEqual((state, allowed), ((0, 100), True))
+        state, allowed = take_token(state, 2, 0.5, now=101)
+        self.assertFalse(allowed)
+        state, allowed = take_token(state, 2, 0.5, now=102)
+        self.assertEqual((state, allowed), ((0, 102), True))
+        # Корзина не копит больше ёмкости.
+        state, _ = take_token(state, 2, 0.5, now=1000)
+        self.assertEqual(state, (1, 1000))
+
+    def test_cache_store(self):
+        cache.clear()
+        store = CacheBucketStore()
+        self.assertIsNone(store.consume('key', 1, 1 / 60))
+        self.assertAlmostEqual(store.consume('key', 1, 1 / 60), 60, delta=1)
+        self.assertIsNone(store.consume('other', 1, 1 / 60))
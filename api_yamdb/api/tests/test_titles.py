@@ -0,0 +1,216 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Genre, Review, Title
+
+User = get_user_model()
+
+
+class TitleQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='film')
+        cls.genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def create_titles(self, count):
+        for i in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {i}',
+                year=2000,
+                category=self.category
+            )
+            title.genre.set(self.genres)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        """Список произведений выполняется за постоянное число запросов."""
+        self.create_titles(20)
+        for limit in (5, 20):
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    '/api/v1/titles/', {'limit': limit}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+            self.assertEqual(len(response.data['results'][0]['genre']), 3)
+
+    def test_retrieve_query_count(self):
+        self.create_titles(1)
+        title = Title.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/titles/{title.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category']['slug'], 'film')
+
+
+class TitleCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Фильм', slug='film')
+        self.title = Title.objects.create(
+            name='Произведение', year=2000, category=self.category
+        )
+        self.url = f'/api/v1/titles/{self.title.pk}/'
+
+    def test_repeated_requests_are_served_from_cache(self):
+        self.client.get('/api/v1/titles/', {'year': 2000, 'limit': 5})
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/v1/titles/', {'limit': 5, 'year': 2000}
+            )
+        self.assertEqual(response.data['count'], 1)
+
+    @override_settings(API_CACHE_RESPONSES=False)
+    def test_responses_are_not_cached_when_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['name'], 'Произведение')
+
+    def test_model_writes_invalidate_cache(self):
+        self.client.get(self.url)
+        self.category.name = 'Кино'
+        self.category.save()
+        self.assertEqual(
+            self.client.get(self.url).data['category']['name'], 'Кино'
+        )
+        self.title.name = 'Изменено'
+        self.title.save()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Изменено')
+
+    def test_review_invalidates_only_its_title(self):
+        other = Title.objects.create(
+            name='Другое', year=2000, category=self.category
+        )
+        other_url = f'/api/v1/titles/{other.pk}/'
+        self.client.get(self.url)
+        self.client.get(other_url)
+        self.client.get('/api/v1/titles/')
+        author = User.objects.create_user(username='author')
+        Review.objects.create(
+            title=self.title, author=author, text='Отзыв', score=8
+        )
+
+        self.assertEqual(self.client.get(self.url).data['rating'], 8)
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+        ratings = {
+            title['id']: title['rating']
+            for title in self.client.get('/api/v1/titles/').data['results']
+        }
+        self.assertEqual(ratings[self.title.pk], 8)
+
+
+class TitleSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.by_description = Title.objects.create(
+            name='Властелин колец', year=1954, description='Дракон на обложке'
+        )
+        cls.by_name = Title.objects.create(name='Дракон', year=2000)
+        Title.objects.create(name='Другое', year=2001)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_search_by_name_and_description(self):
+        # Целое слово: в PostgreSQL описание ищется по словам
+        # search_vector, а не по подстроке, как icontains в SQLite.
+        # Регистр совпадает: LIKE в SQLite не сравнивает кириллицу
+        # без учёта регистра.
+        response = self.client.get('/api/v1/titles/', {'search': 'Дракон'})
+        self.assertEqual(
+            [title['id'] for title in response.data['results']],
+            [self.by_name.pk, self.by_description.pk]
+        )
+
+
+class TitleOrderingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.film = Category.objects.create(name='Фильм', slug='film')
+        cls.book = Category.objects.create(name='Книга', slug='book')
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'user{i}@ya.ru')
+            for i in range(2)
+        ]
+        cls.titles = {}
+        for name, category, scores in (
+            ('a', cls.film, (5,)),
+            ('b', cls.film, (9, 7)),
+            ('c', cls.book, (8,)),
+            ('d', cls.film, (5,)),
+            ('e', cls.book, ()),
+        ):
+            title = Title.objects.create(name=name, year=2000,
+                                         category=category)
+            for user, score in zip(cls.users, scores):
+                Review.objects.create(title=title, author=user, score=score)
+            cls.titles[name] = title
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def names(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data
+        if isinstance(results, dict):
+            results = results['results']
+        return ''.join(title['name'] for title in results)
+
+    def test_ordering_has_id_tiebreaker(self):
+        url = '/api/v1/titles/'
+        self.assertEqual(
+            self.names(url, {'ordering': 'rating', 'category': 'film'}),
+            'adb'
+        )
+        self.assertEqual(
+            self.names(url, {'ordering': '-reviews_count,name'}), 'bacde'
+        )
+
+    def test_unrated_titles_are_last(self):
+        url = '/api/v1/titles/'
+        self.assertEqual(self.names(url, {'ordering': '-rating'}), 'bcade')
+        self.assertEqual(self.names(url, {'ordering': 'rating'}), 'adbce')
+
+    def test_top_titles(self):
+        url = '/api/v1/titles/top/'
+        self.assertEqual(self.names(url, {}), 'bcad')
+        self.assertEqual(self.names(url, {'category': 'film'}), 'bad')
+        self.assertEqual(self.names(url, {'limit': 2}), 'bc')
+        self.assertEqual(
+            self.client.get(url, {'limit': 0}).status_code, 400
+        )
+
+    @override_settings(API_LEADERBOARD_SIZE=3)
+    def test_leaderboard_is_updated_incrementally(self):
+        url = '/api/v1/titles/top/'
+        self.assertEqual(self.names(url, {}), 'bca')
+        self.assertEqual(self.names(url, {'category': 'film'}), 'bad')
+        Review.objects.create(
+            title=self.titles['e'], author=self.users[0], score=10
+        )
+        Review.objects.filter(title=self.titles['b']).delete()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.names(url, {'limit': 2}), 'ec')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.names(url, {'category': 'film'}), 'ad')
+        # Место b заняло бы произведение вне лидерборда - он строится заново.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.names(url, {}), 'eca')
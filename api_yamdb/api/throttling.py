@@ -0,0 +1,142 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+THROTTLE_KEY = 'api:throttle:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def refill_rate(rate):
+    """'10/min' -> токенов в секунду, периоды как у DRF."""
+    requests, period = rate.split('/')
+    return int(requests) / PERIODS[period[0]]
+
+
+def take_token(state, capacity, refill, now):
+    """
+    Корзина после запроса и пропущен ли он. state - (токены, время)
+    или None для полной корзины; refill - токенов в секунду.
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    return (tokens, now), allowed
+
+
+def wait_for_token(state, refill):
+    return (1 - state[0]) / refill
+
+
+class LocalBucketStore:
+    """Корзины в памяти процесса: для тестов и одного воркера."""
+    max_entries = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def consume(self, key, capacity, refill):
+        """None, если токен взят, иначе секунды до следующего токена."""
+        with self.lock:
+            if len(self.buckets) >= self.max_entries:
+                self.buckets.clear()
+            state, allowed = take_token(
+                self.buckets.get(key), capacity, refill, time.time()
+            )
+            self.buckets[key] = state
+        return None if allowed else wait_for_token(state, refill)
+
+
+class CacheBucketStore:
+    """
+    Корзины в кэше Django (Redis, memcached), общие для всех воркеров.
+    Чтение и запись не атомарны: при гонке корзина может пропустить
+    лишний запрос, но не заблокирует клиента сверх лимита.
+    """
+
+    def consume(self, key, capacity, refill):
+        cache_key = THROTTLE_KEY.format(hashlib.md5(key.encode()).hexdigest())
+        state, allowed = take_token(
+            cache.get(cache_key), capacity, refill, time.time()
+        )
+        # Через capacity / refill секунд корзина снова полная.
+        cache.set(cache_key, state, timeout=math.ceil(capacity / refill))
+        return None if allowed else wait_for_token(state, refill)
+
+
+stores = {}
+
+
+def get_bucket_store():
+    path = settings.API_THROTTLE_STORE
+    if path not in stores:
+        stores[path] = import_string(path)()
+    return stores[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket по ключам get_keys(). Параметры корзины берутся из
+    API_THROTTLE_RATES['<throttle_scope представления>:<kind>'] -
+    (пополнение 'N/period', ёмкость). Отказы считаются в метриках.
+    """
+    kind = None
+
+    def get_keys(self, request, view):
+        raise NotImplementedError('.get_keys() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = f'{view.throttle_scope}:{self.kind}'
+        if scope not in settings.API_THROTTLE_RATES:
+            return True
+        rate, capacity = settings.API_THROTTLE_RATES[scope]
+        refill = refill_rate(rate)
+        store = get_bucket_store()
+        for key in self.get_keys(request, view):
+            wait = store.consume(f'{scope}:{key}', capacity, refill)
+            if wait is not None:
+                self.wait_seconds = wait
+                registry.increment(
+                    f'throttled_{self.kind}',
+                    request.resolver_match.view_name
+                )
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IpThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_keys(self, request, view):
+        return [self.get_ident(request)]
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """Отдельные корзины для каждого username и email из запроса."""
+    kind = 'identity'
+    fields = ('username', 'email')
+
+    def get_keys(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        keys = []
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                keys.append(f'{field}:{value.strip().lower()}')
+        return keys
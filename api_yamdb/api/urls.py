@@ -1,8 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet, JWTToken,
-                    ReviewViewSet, Signup, TitleViewSet, UsersViewSet)
+from .views import (CategoryViewSet, CommentViewSet, Export, GenreViewSet,
+                    JWTToken, Metrics, ReviewViewSet, Signup, TitleViewSet,
+                    UsersViewSet)
 
 app_name = 'api'
 
@@ -25,5 +26,7 @@ router_v1.register(
 urlpatterns = [
     path('v1/auth/token/', JWTToken.as_view(), name='get_token'),
     path('v1/auth/signup/', Signup.as_view(), name='signup'),
+    path('v1/metrics/', Metrics.as_view(), name='metrics'),
+    path('v1/export/<str:dataset>/', Export.as_view(), name='export'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,27 +1,37 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Category, Genre, Review, Title
-
-from .filters import TitleFilter
-from .mixins import CustomViewSet
+from reviews.export import CONTENT_TYPES, DATASETS, EXPORT_FORMATS
+from reviews.models import Category, Genre, Title
+from users.models import OutgoingEmail
+
+from .authentication import issue_access_token
+from .bulk import TitleBulkWriter
+from .cache import (CachedResponseMixin, CachedRetrieveMixin,
+                    ConditionalGetMixin)
+from .filters import TitleFilter, TitleOrderingFilter
+from .leaderboard import ALL_TITLES, get_leaderboard
+from .metrics import registry
+from .mixins import CustomViewSet, NestedParentMixin
+from .pagination import FeedPagination
 from .permissions import (IsAdminOnly, IsAdminUserOrReadOnly,
                           IsStaffOrAuthorOrReadOnly)
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer, SignUpSerializer,
                           TitleReadSerializer, TitleWriteSerializer,
-                          TokenSerializer, UserForAdminSerializer,
-                          UserSerializer)
+                          TokenSerializer, TopTitlesQuerySerializer,
+                          UserForAdminSerializer, UserSerializer)
+from .throttling import IdentityThrottle, IpThrottle
 
 User = get_user_model()
 
@@ -44,16 +54,18 @@ class UsersViewSet(viewsets.ModelViewSet):
         url_path='me'
     )
     def get_current_user_info(self, request):
+        # request.user собран из токена, для профиля нужна полная запись.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'PATCH':
-            if request.user.is_admin:
+            if user.is_admin:
                 serializer = UserForAdminSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True
                 )
             else:
                 serializer = UserSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True
                 )
@@ -64,7 +76,7 @@ class UsersViewSet(viewsets.ModelViewSet):
                 serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST
             )
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(user)
         return Response(serializer.data)
 
 
@@ -73,6 +85,8 @@ class Signup(APIView):
     Получить код подтверждения по email.
     """
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IpThrottle, IdentityThrottle)
+    throttle_scope = 'signup'
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -104,11 +118,11 @@ class Signup(APIView):
             f'\nКод подтвержения для доступа к API: '
             f'{confirmation_code}'
         )
-        send_mail(
+        OutgoingEmail.objects.enqueue(
             'Код подтвержения для доступа к API!',
             email_body,
             settings.EMAIL_ADMIN,
-            recipient_list=[email],
+            email,
         )
 
 
@@ -116,24 +130,55 @@ class JWTToken(APIView):
     """
     Получение JWT-токена по username и confirmation code.
     """
+    throttle_classes = (IpThrottle, IdentityThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         if serializer.is_valid():
             return Response(
-                {
-                    'token': str(
-                        RefreshToken.for_user(
-                            serializer.user
-                        ).access_token
-                    )
-                },
+                {'token': str(issue_access_token(serializer.user))},
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BaseViewSet(CustomViewSet):
+class Metrics(APIView):
+    """
+    Гистограммы времени ответа и числа запросов по представлениям.
+    """
+    permission_classes = (IsAuthenticated, IsAdminOnly)
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+
+class Export(APIView):
+    """
+    Потоковая выгрузка набора данных в формате importdata,
+    ?output=csv (по умолчанию) или ?output=ndjson.
+    """
+    permission_classes = (IsAuthenticated, IsAdminOnly)
+
+    def get(self, request, dataset):
+        output = request.query_params.get('output', 'csv')
+        if dataset not in DATASETS:
+            raise NotFound(f'Набор {dataset} не найден')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': [
+                f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}'
+            ]})
+        response = StreamingHttpResponse(
+            EXPORT_FORMATS[output](dataset, settings.EXPORT_CHUNK_SIZE),
+            content_type=CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{dataset}.{output}"'
+        )
+        return response
+
+
+class BaseViewSet(CachedResponseMixin, CustomViewSet):
     """
     Базовый класс для работы с категориями и жанрами.
     """
@@ -149,6 +194,7 @@ class CategoryViewSet(BaseViewSet):
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespaces = ('categories',)
 
 
 class GenreViewSet(BaseViewSet):
@@ -157,51 +203,101 @@ class GenreViewSet(BaseViewSet):
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespaces = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedRetrieveMixin,
+                   viewsets.ModelViewSet):
     """
     Работа с произведениями.
     """
-    queryset = Title.objects.all()
+    queryset = Title.objects.with_relations()
     permission_classes = (IsAdminUserOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    cache_namespaces = ('titles', 'ratings')
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return 'titles', f'title:{self.kwargs.get(self.lookup_field)}'
+        return super().get_cache_namespaces()
 
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PATCH']:
             return TitleWriteSerializer
         return TitleReadSerializer
 
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """Лучшие по рейтингу произведения, ?category=slug&limit=10."""
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ids = get_leaderboard(
+            params.validated_data.get('category', ALL_TITLES),
+            params.validated_data['limit']
+        )
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = TitleReadSerializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """
+        Пакет произведений: POST - создание, PATCH - правка по id.
+        С ?atomic=true ошибка в одном элементе отменяет весь пакет.
+        """
+        writer = TitleBulkWriter(
+            request.data,
+            atomic=request.query_params.get('atomic') in ('true', '1')
+        )
+        if request.method == 'POST':
+            code, results = writer.create()
+        else:
+            code, results = writer.update()
+        return Response(results, status=code)
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedParentMixin,
+                    viewsets.ModelViewSet):
     """
     Проставление оценок для публикаций.
     Получение оценки по id публикации.
     """
     serializer_class = ReviewSerializer
     permission_classes = (IsStaffOrAuthorOrReadOnly,)
+    pagination_class = FeedPagination
+
+    def get_cache_namespaces(self):
+        return f'reviews:{self.kwargs.get("title_id")}', 'users'
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_title().reviews.select_related('author').only(
+            'id', 'title', 'text', 'score', 'pub_date', 'comments_count',
+            'author__username'
+        )
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, NestedParentMixin,
+                     viewsets.ModelViewSet):
     """
     Комментирование оценок к публикациям.
     """
     serializer_class = CommentSerializer
     permission_classes = (IsStaffOrAuthorOrReadOnly,)
+    pagination_class = FeedPagination
+
+    def get_cache_namespaces(self):
+        return f'comments:{self.kwargs.get("review_id")}', 'users'
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return self.get_review().comments.select_related('author').only(
+            'id', 'review', 'text', 'pub_date', 'author__username'
+        )
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
@@ -3,14 +3,63 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 has no native ASGI handler, so the WSGI application is wrapped
+with asgiref and every request runs in a pool of ASGI_WORKER_THREADS threads.
+One uvicorn worker therefore overlaps that many requests waiting on the
+database or the cache.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+# Каждый поток держит своё соединение с базой: в сумме
+# GUNICORN_WORKERS * ASGI_WORKER_THREADS соединений. Переменную
+# ASGI_THREADS asgiref 3.4 читает при импорте вне event loop и падает.
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASGI_WORKER_THREADS', 10)),
+    thread_name_prefix='asgi',
+)
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref по умолчанию выполняет WSGI-приложение в одном потоке
+    # (thread_sensitive), и запросы воркера шли бы строго по очереди.
+    # Публичного способа передать executor в WsgiToAsgi нет, поэтому
+    # берётся исходная функция из обёртки sync_to_async. Это внутреннее
+    # устройство asgiref 3.4, версия закреплена в requirements.txt;
+    # при обновлении её проверяет test_asgi.
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+        thread_sensitive=False,
+        executor=executor,
+    )
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send
+        )
+
+    @staticmethod
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = ThreadPoolWsgiToAsgi(get_wsgi_application())
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'users',
@@ -36,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryBudgetMiddleware',
+    'api.db.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +69,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+TEST_RUNNER = 'api_yamdb.test_runner.TestRunner'
+
 
 # Database
 
@@ -76,10 +81,100 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', '5432')
+        'PORT': os.getenv('DB_PORT', '5432'),
+        # Постоянные соединения: секунды жизни, 0 - закрывать после запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # Проверка простаивавших соединений, см. api.db.check_idle_connections.
+        'DB_HEALTH_CHECKS': os.getenv('DB_HEALTH_CHECKS', 'True') == 'True',
+        # Через PgBouncer в режиме transaction серверные курсоры недоступны.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS') == 'True'
+        ),
+    }
+}
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host1,host2:5433
+for index, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает только из default.
+DB_READ_YOUR_WRITES_WINDOW = int(os.getenv('DB_READ_YOUR_WRITES_WINDOW', 5))
+
+# Искусственная задержка запросов к базе, только для bench_server.
+DB_SIMULATED_LATENCY_MS = float(os.getenv('DB_SIMULATED_LATENCY_MS', 0))
+
+# Простой соединения, после которого оно проверяется перед запросом.
+DB_HEALTH_CHECK_IDLE = int(os.getenv('DB_HEALTH_CHECK_IDLE', 10))
+
+# Cache
+
+# Версии коллекций, отметки об отзыве прав, закрепление за основной
+# базой и корзины троттлинга должны быть общими для всех воркеров.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'memcached:11211'),
     }
 }
 
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Кеш виден всем процессам сервера.
+CACHE_IS_SHARED = CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Кеш ответов API. С кешем в памяти процесса выключен: версии коллекций
+# не видны другим процессам (воркерам, mailer, командам manage.py).
+API_CACHE_RESPONSES = (
+    os.getenv('API_CACHE_RESPONSES', str(CACHE_IS_SHARED)) == 'True'
+)
+
+# Сколько лучших произведений хранится в лидерборде /titles/top/.
+API_LEADERBOARD_SIZE = int(os.getenv('API_LEADERBOARD_SIZE', 100))
+
+# Наибольший размер пакета /titles/bulk/.
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', 500))
+
+# Строк за одно чтение серверного курсора при выгрузке.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# Бюджеты SQL-запросов на представление: "METHOD view_name" или view_name.
+API_QUERY_BUDGETS = {
+    'GET api:titles-list': 3,
+    'GET api:titles-detail': 2,
+    'GET api:titles-top': 3,
+    'GET api:reviews-list': 3,
+    'GET api:reviews-detail': 2,
+    'POST api:reviews-list': 5,
+    'GET api:comments-list': 3,
+    'GET api:comments-detail': 2,
+}
+
+API_QUERY_BUDGET_DEFAULT = None
+
+# Превышение бюджета: True - исключение, False - warning в лог.
+# В тестах включено через api_yamdb.test_runner.TestRunner.
+API_QUERY_BUDGET_RAISE = os.getenv('API_QUERY_BUDGET_RAISE') == 'True'
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -121,7 +216,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -129,6 +224,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    # Перед приложением стоит nginx: адрес клиента - последний
+    # в X-Forwarded-For, который nginx выставляет сам.
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', 1)),
 }
 
 SIMPLE_JWT = {
@@ -136,9 +234,38 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Token bucket для регистрации и выдачи токена:
+# '<throttle_scope>:<ip|identity>' -> (пополнение, ёмкость корзины).
+API_THROTTLE_RATES = {
+    'signup:ip': ('20/hour', 5),
+    'signup:identity': ('3/hour', 3),
+    'token:ip': ('60/hour', 10),
+    'token:identity': ('20/hour', 5),
+}
+
+# api.throttling.LocalBucketStore хранит корзины в памяти процесса.
+API_THROTTLE_STORE = os.getenv(
+    'API_THROTTLE_STORE', 'api.throttling.CacheBucketStore'
+)
+
+# Как долго процесс доверяет своей копии списка пользователей,
+# сменивших роль, прежде чем перечитать её из кэша.
+AUTH_STALE_USERS_TTL = int(os.getenv('AUTH_STALE_USERS_TTL', 30))
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_ADMIN = 'admin@example.com'
+
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', 100))
+
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', 5))
+
+# Задержка перед первой повторной попыткой, дальше удваивается.
+EMAIL_QUEUE_RETRY_DELAY = int(os.getenv('EMAIL_QUEUE_RETRY_DELAY', 60))
+
+# Сколько секунд взятая в отправку пачка скрыта от других воркеров. Если
+# воркер упал посреди пачки, неотправленные письма вернутся после срока.
+EMAIL_QUEUE_LEASE = int(os.getenv('EMAIL_QUEUE_LEASE', 600))
@@ -0,0 +1,30 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Тесты идут в одном процессе и не зависят от memcached:
+    на время прогона кеш хранится в памяти процесса,
+    кеш ответов API включён, а превышение бюджета запросов
+    роняет тест.
+    """
+    test_settings = {
+        'CACHES': {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'yamdb-test',
+            }
+        },
+        'API_CACHE_RESPONSES': True,
+        'API_QUERY_BUDGET_RAISE': True,
+    }
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.settings_override = override_settings(**self.test_settings)
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,47 @@
+import logging
+import os
+
+ASGI_WORKER_CLASS = 'uvicorn.workers.UvicornWorker'
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+# GUNICORN_SERVER_MODE=asgi - воркеры uvicorn и api_yamdb.asgi.
+server_mode = os.getenv('GUNICORN_SERVER_MODE', 'wsgi')
+if server_mode == 'asgi':
+    worker_class = ASGI_WORKER_CLASS
+    wsgi_app = 'api_yamdb.asgi:application'
+else:
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+    wsgi_app = 'api_yamdb.wsgi:application'
+# Больше одного воркера - только с общим кешем (CACHE_BACKEND).
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# Django держит по соединению на поток каждого воркера (CONN_MAX_AGE),
+# их общее число не должно превышать пул PgBouncer/max_connections.
+if server_mode == 'asgi':
+    worker_connections = int(os.getenv('ASGI_WORKER_THREADS', 10))
+else:
+    worker_connections = threads
+db_max_connections = int(os.getenv('DB_MAX_CONNECTIONS', 0))
+if db_max_connections and workers * worker_connections > db_max_connections:
+    logging.getLogger('gunicorn.error').warning(
+        'gunicorn may open %s database connections, DB_MAX_CONNECTIONS '
+        'is %s: lower GUNICORN_WORKERS and GUNICORN_THREADS '
+        'or ASGI_WORKER_THREADS',
+        workers * worker_connections, db_max_connections
+    )
+
+
+def on_starting(server):
+    # Отзыв прав, версии коллекций и троттлинг хранятся в кеше Django:
+    # с кешем в памяти процесса воркеры не видят изменений друг друга.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from django.conf import settings
+
+    if workers > 1 and not settings.CACHE_IS_SHARED:
+        raise RuntimeError(
+            f'GUNICORN_WORKERS={workers} requires a shared cache, '
+            f'CACHE_BACKEND is {settings.CACHES["default"]["BACKEND"]}'
+        )
@@ -0,0 +1,66 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+
+from .models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+# Наборы в порядке загрузки и колонки файлов, которые читает importdata.
+DATASETS = {
+    'users': (User, ('id', 'username', 'email', 'role', 'bio',
+                     'first_name', 'last_name')),
+    'genre': (Genre, ('id', 'name', 'slug')),
+    'category': (Category, ('id', 'name', 'slug')),
+    'titles': (Title, ('id', 'name', 'year', 'description', 'category')),
+    'genre_title': (Title.genre.through, ('id', 'title_id', 'genre_id')),
+    'review': (Review, ('id', 'title_id', 'text', 'author', 'score',
+                        'pub_date')),
+    'comments': (Comment, ('id', 'review_id', 'text', 'author', 'pub_date')),
+}
+
+# Колонки внешних ключей, названные не по полю модели.
+COLUMN_FIELDS = {'category': 'category_id', 'author': 'author_id'}
+
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def export_rows(dataset, chunk_size):
+    """
+    Строки набора по возрастанию id. iterator() читает их порциями
+    по chunk_size серверным курсором, не держа весь набор в памяти.
+    """
+    model, columns = DATASETS[dataset]
+    fields = [COLUMN_FIELDS.get(column, column) for column in columns]
+    return model.objects.order_by('id').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(dataset, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(DATASETS[dataset][1])
+    for row in export_rows(dataset, chunk_size):
+        yield writer.writerow(
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        )
+
+
+def ndjson_lines(dataset, chunk_size):
+    columns = DATASETS[dataset][1]
+    for row in export_rows(dataset, chunk_size):
+        yield json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False, default=str
+        ) + '\n'
+
+
+EXPORT_FORMATS = {'csv': csv_lines, 'ndjson': ndjson_lines}
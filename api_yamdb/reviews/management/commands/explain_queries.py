@@ -0,0 +1,91 @@
+import json
+import os
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.models import Comment, Review, Title
+
+DEFAULT_OUTPUT = 'explain_plans.json'
+
+
+def hot_queries():
+    """
+    Запросы API, под которые подобраны составные индексы.
+    Выбираются только колонки, существующие до миграции 0005,
+    чтобы план "before" можно было снять на базе без индексов.
+    """
+    title = Title.objects.order_by('-review_count', 'id').values(
+        'pk', 'year', 'category_id', 'category__slug'
+    ).first()
+    review_id = Review.objects.filter(
+        comments__isnull=False
+    ).values_list('pk', flat=True).first()
+    if title is None or review_id is None:
+        raise CommandError(
+            'No data to explain: load a fixture with importdata '
+            'or generate one with seed_bench first'
+        )
+    genre_slug = Title.genre.through.objects.filter(
+        title_id=title['pk']
+    ).values_list('genre__slug', flat=True).first()
+    titles = Title.objects.only('id', 'name', 'year', 'category_id')
+    return {
+        'reviews_by_title': Review.objects.filter(
+            title_id=title['pk']
+        ).only('id', 'title_id', 'pub_date').order_by('pub_date', 'id')[:10],
+        'comments_by_review': Comment.objects.filter(
+            review_id=review_id
+        ).only('id', 'review_id', 'pub_date').order_by('pub_date', 'id')[:10],
+        'titles_by_category_and_year': titles.filter(
+            category_id=title['category_id'], year=title['year']
+        )[:10],
+        'titles_by_category_slug': titles.filter(
+            category__slug=title['category__slug']
+        )[:10],
+        'titles_by_genre_slug': titles.filter(genre__slug=genre_slug)[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Records EXPLAIN plans of the hot API queries under a label, '
+        'e.g. before and after migrating the indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('label', help='Name of this run, e.g. "before"')
+        parser.add_argument(
+            '--output',
+            default=DEFAULT_OUTPUT,
+            help='JSON file the plans are merged into',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only)',
+        )
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+        plans = {}
+        for name, queryset in hot_queries().items():
+            plans[name] = {
+                'sql': str(queryset.query),
+                'plan': queryset.explain(**explain_options).splitlines(),
+            }
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write('\n'.join(plans[name]['plan']))
+
+        runs = {}
+        if os.path.exists(options['output']):
+            with open(options['output'], encoding='utf-8') as file:
+                runs = json.load(file)
+        runs[options['label']] = {'vendor': connection.vendor, 'plans': plans}
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(runs, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Plans saved to {options["output"]} as "{options["label"]}"'
+        ))
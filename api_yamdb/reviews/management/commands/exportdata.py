@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from reviews.export import DATASETS, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports the catalog, reviews and comments into files '
+        'that importdata can load back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='.',
+            help='Directory the files are written to',
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+            help='csv is the layout importdata reads, ndjson - one JSON '
+                 'object per line',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help='Rows fetched from the database cursor at a time',
+        )
+        parser.add_argument(
+            'datasets',
+            nargs='*',
+            help=f'Datasets to export: {", ".join(DATASETS)}; all by default',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['datasets']) - set(DATASETS)
+        if unknown:
+            raise CommandError(f'Unknown datasets: {", ".join(unknown)}')
+        lines = EXPORT_FORMATS[options['format']]
+        os.makedirs(options['path'], exist_ok=True)
+        for dataset in options['datasets'] or DATASETS:
+            path = os.path.join(
+                options['path'], f'{dataset}.{options["format"]}'
+            )
+            started = time.monotonic()
+            rows = 0
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                for line in lines(dataset, options['chunk_size']):
+                    file.write(line)
+                    rows += 1
+            if options['format'] == 'csv':
+                rows -= 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{dataset}: {rows} rows in '
+                f'{time.monotonic() - started:.2f} sec -> {path}'
+            ))
@@ -1,10 +1,16 @@
 import csv
+import os
+import time
+from contextlib import contextmanager
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
 
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.utils import chunked, reset_sequences
 
 User = get_user_model()
 
@@ -13,10 +19,30 @@ LIST = {
     Genre: 'genre.csv',
     Category: 'category.csv',
     Title: 'titles.csv',
+    Title.genre.through: 'genre_title.csv',
     Review: 'review.csv',
     Comment: 'comments.csv'
 }
 
+# Колонки CSV, ссылающиеся на другие модели: колонка -> (поле, модель).
+FOREIGN_KEYS = {
+    Title: {'category': ('category_id', Category)},
+    Title.genre.through: {
+        'title_id': ('title_id', Title),
+        'genre_id': ('genre_id', Genre),
+    },
+    Review: {
+        'title_id': ('title_id', Title),
+        'author': ('author_id', User),
+    },
+    Comment: {
+        'review_id': ('review_id', Review),
+        'author': ('author_id', User),
+    },
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
 ALREADY_LOADED_ERROR_MESSAGE = """
 If you need to reload the data from the CSV file,
 first delete the db.sqlite3 file to destroy the database.
@@ -24,57 +50,106 @@ Then, run `python manage.py migrate` for a new empty
 database with tables"""
 
 
+@contextmanager
+def keep_auto_now_add(fields):
+    """
+    bulk_create заполняет поля auto_now_add текущим временем.
+    На время загрузки они сохраняют значения из CSV.
+    """
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
 class Command(BaseCommand):
     help = "Loads data from fixture"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows read and inserted per batch',
+        )
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Directory with the CSV files',
+        )
+
     def handle(self, *args, **options):
-        # Проверим если существует хотя бы один пользователь, то ошибка
+        # Проверим если существует хотя бы один жанр, то ошибка
         if Genre.objects.exists():
             print('Data already loaded...exiting.')
             print(ALREADY_LOADED_ERROR_MESSAGE)
             return
 
-        for model, csv_f in LIST.items():
-            with open(
-                    f'{settings.BASE_DIR}/static/data/{csv_f}',
-                    'r',
-                    encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                if model in (User, Category, Genre):
-                    model.objects.bulk_create(model(**data) for data in reader)
-                else:
-                    for row in reader:
-                        if model == Title:
-                            Title(
-                                id=row['id'],
-                                name=row['name'],
-                                year=row['year'],
-                                category=Category.objects.get(
-                                    pk=row['category']),
-                            ).save()
-
-                        elif model == Review:
-                            Review(
-                                id=row['id'],
-                                title=Title.objects.get(pk=row['title_id']),
-                                text=row['text'],
-                                author=User.objects.get(pk=row['author']),
-                                score=row['score'],
-                                pub_date=row['pub_date'],
-                            ).save()
-
-                        elif model == Comment:
-                            Comment(
-                                id=row['id'],
-                                review=Review.objects.get(pk=row['review_id']),
-                                text=row['text'],
-                                author=User.objects.get(pk=row['author']),
-                                pub_date=row['pub_date']
-                            ).save()
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Loads data {model.__name__} is success'
-                    )
-                )
+        self.batch_size = options['batch_size']
+        self.loaded_ids = {}
+        with transaction.atomic():
+            for model, csv_f in LIST.items():
+                self.load(model, os.path.join(options['path'], csv_f))
+            reset_sequences(LIST)
+            # bulk_create не отправляет сигналы, поэтому рейтинги и
+            # счётчики комментариев считаются один раз после загрузки.
+            started = time.monotonic()
+            updated = Title.objects.recompute_ratings()
+            Review.objects.recompute_comment_counts()
+            self.stdout.write(self.style.SUCCESS(
+                f'Ratings recomputed for {updated} titles '
+                f'in {time.monotonic() - started:.2f} sec'
+            ))
         self.stdout.write(self.style.SUCCESS('Data loading completed'))
+
+    def load(self, model, path):
+        started = time.monotonic()
+        self.loaded_ids[model] = ids = set()
+        rows = 0
+        with open(path, 'r', encoding='utf-8') as csv_file:
+            reader = csv.DictReader(csv_file)
+            fields = model._meta.concrete_fields
+            # Пустая ячейка в nullable-поле - NULL, как его пишет exportdata.
+            self.nullable = {field.attname for field in fields if field.null}
+            self.auto_dates = [
+                field for field in fields
+                if getattr(field, 'auto_now_add', False)
+                and field.attname in reader.fieldnames
+            ]
+            with keep_auto_now_add(self.auto_dates):
+                for chunk in chunked(reader, self.batch_size):
+                    objs = [self.build(model, row) for row in chunk]
+                    model.objects.bulk_create(objs)
+                    ids.update(obj.pk for obj in objs)
+                    rows += len(objs)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Loads data {model.__name__} is success: {rows} rows, '
+                f'{rows / elapsed if elapsed else rows:.0f} rows/sec'
+            )
+        )
+
+    def build(self, model, row):
+        data = dict(row)
+        for column, (field, related) in FOREIGN_KEYS.get(model, {}).items():
+            value = data.pop(column) or None
+            if value is not None:
+                value = int(value)
+                if value not in self.loaded_ids[related]:
+                    raise CommandError(
+                        f'{model.__name__} {data.get("id")}: '
+                        f'{related.__name__} {value} not found'
+                    )
+            data[field] = value
+        for column, value in data.items():
+            if value == '' and column in self.nullable:
+                data[column] = None
+        for field in self.auto_dates:
+            if not data[field.attname]:
+                data[field.attname] = timezone.now()
+        data['id'] = int(data['id'])
+        return model(**data)
@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Recomputes score sums, review counts and ratings of titles'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.recompute_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ratings recomputed for {updated} titles')
+        )
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Finds titles and reviews whose denormalized counters drifted '
+        'from the actual reviews and comments and recomputes them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted rows',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.reconcile(
+                Title, Title.objects.with_counter_drift(),
+                'recompute_ratings', options['dry_run']
+            )
+            self.reconcile(
+                Review, Review.objects.with_counter_drift(),
+                'recompute_comment_counts', options['dry_run']
+            )
+
+    def reconcile(self, model, drifted, method, dry_run):
+        ids = list(drifted.values_list('pk', flat=True))
+        if ids and not dry_run:
+            getattr(model.objects.filter(pk__in=ids), method)()
+        self.stdout.write(self.style.SUCCESS(
+            f'{model.__name__}: {len(ids)} drifted'
+            f'{"" if dry_run else ", fixed"}'
+        ))
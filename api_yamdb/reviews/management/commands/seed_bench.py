@@ -0,0 +1,162 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.utils import chunked, reset_sequences
+
+User = get_user_model()
+
+WORDS = (
+    'тень', 'ветер', 'город', 'дракон', 'море', 'звезда', 'время', 'сад',
+    'огонь', 'река', 'ночь', 'зима', 'дорога', 'песня', 'остров', 'король',
+    'shadow', 'wind', 'city', 'dragon', 'sea', 'star', 'time', 'garden',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a deterministic benchmark dataset with a skewed '
+        'popularity distribution of titles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Zipf exponent of reviews per title',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if Title.objects.exists():
+            raise CommandError('Catalog is not empty, use a fresh database')
+        if options['users'] < 1 or options['titles'] < 1:
+            raise CommandError('At least one user and one title are required')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.user_offset = User.objects.aggregate(
+            max_id=Max('id')
+        )['max_id'] or 0
+        review_counts = self.review_counts(
+            options['titles'], options['reviews'],
+            options['users'], options['skew']
+        )
+        total_reviews = sum(review_counts)
+
+        with transaction.atomic():
+            self.insert(User, self.users(options['users']))
+            self.insert(
+                Category, self.catalog(Category, options['categories'])
+            )
+            self.insert(Genre, self.catalog(Genre, options['genres']))
+            self.insert(Title, self.titles(
+                options['titles'], options['categories']
+            ))
+            self.insert(Title.genre.through, self.title_genres(
+                options['titles'], options['genres']
+            ))
+            self.insert(Review, self.reviews(review_counts, options['users']))
+            if total_reviews:
+                self.insert(Comment, self.comments(
+                    options['comments'], total_reviews, options['users']
+                ))
+            reset_sequences((User, Category, Genre, Title, Review, Comment))
+            Title.objects.recompute_ratings()
+            Review.objects.recompute_comment_counts()
+        self.stdout.write(self.style.SUCCESS('Benchmark dataset is ready'))
+
+    def insert(self, model, objs):
+        started = time.monotonic()
+        rows = 0
+        for chunk in chunked(objs, self.batch_size):
+            model.objects.bulk_create(chunk)
+            rows += len(chunk)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model.__name__}: {rows} rows, '
+            f'{rows / elapsed if elapsed else rows:.0f} rows/sec'
+        )
+
+    def review_counts(self, titles, reviews, users, skew):
+        # Популярность по закону Ципфа, отзывов на произведение
+        # не больше числа пользователей из-за unique_review.
+        weights = [1 / rank ** skew for rank in range(1, titles + 1)]
+        total = sum(weights)
+        counts = [min(users, int(reviews * weight / total))
+                  for weight in weights]
+        self.rng.shuffle(counts)
+        return counts
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def users(self, count):
+        for i in range(1, count + 1):
+            yield User(
+                id=self.user_offset + i,
+                username=f'bench_user_{i}',
+                email=f'bench_user_{i}@bench.local',
+            )
+
+    def catalog(self, model, count):
+        name = model.__name__.lower()
+        for i in range(1, count + 1):
+            yield model(id=i, name=f'{name} {i}', slug=f'bench-{name}-{i}')
+
+    def titles(self, count, categories):
+        for i in range(1, count + 1):
+            yield Title(
+                id=i,
+                name=self.words(self.rng.randint(1, 3)).capitalize(),
+                year=self.rng.randint(1900, 2022),
+                description=self.words(self.rng.randint(5, 20)),
+                category_id=(
+                    self.rng.randint(1, categories) if categories else None
+                ),
+            )
+
+    def title_genres(self, titles, genres):
+        through = Title.genre.through
+        for title_id in range(1, titles + 1):
+            for genre_id in self.rng.sample(
+                range(1, genres + 1), min(genres, self.rng.randint(1, 3))
+            ):
+                yield through(title_id=title_id, genre_id=genre_id)
+
+    def reviews(self, counts, users):
+        review_id = 0
+        for title_id, count in enumerate(counts, start=1):
+            start = self.rng.randrange(users)
+            for shift in range(count):
+                review_id += 1
+                yield Review(
+                    id=review_id,
+                    title_id=title_id,
+                    author_id=self.user_offset + (start + shift) % users + 1,
+                    text=self.words(self.rng.randint(3, 30)),
+                    score=self.rng.randint(1, 10),
+                )
+
+    def comments(self, count, reviews, users):
+        for i in range(1, count + 1):
+            yield Comment(
+                id=i,
+                # Чем меньше id отзыва, тем больше у него комментариев.
+                review_id=int(reviews * self.rng.random() ** 3) + 1,
+                author_id=self.user_offset + self.rng.randint(1, users),
+                text=self.words(self.rng.randint(3, 20)),
+            )
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:29
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Только для PostgreSQL: в остальных базах поиск работает через icontains.
+POSTGRES_FORWARD = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE FUNCTION reviews_title_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reviews_title_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update();
+
+UPDATE reviews_title SET name = name;
+
+CREATE INDEX reviews_title_search_vector_idx
+    ON reviews_title USING gin (search_vector);
+CREATE INDEX reviews_title_name_trgm_idx
+    ON reviews_title USING gin (name gin_trgm_ops);
+CREATE INDEX reviews_title_name_upper_trgm_idx
+    ON reviews_title USING gin (UPPER(name::text) gin_trgm_ops);
+CREATE INDEX reviews_category_name_upper_trgm_idx
+    ON reviews_category USING gin (UPPER(name::text) gin_trgm_ops);
+CREATE INDEX reviews_genre_name_upper_trgm_idx
+    ON reviews_genre USING gin (UPPER(name::text) gin_trgm_ops);
+"""
+
+POSTGRES_BACKWARD = """
+DROP INDEX IF EXISTS reviews_genre_name_upper_trgm_idx;
+DROP INDEX IF EXISTS reviews_category_name_upper_trgm_idx;
+DROP INDEX IF EXISTS reviews_title_name_upper_trgm_idx;
+DROP INDEX IF EXISTS reviews_title_name_trgm_idx;
+DROP INDEX IF EXISTS reviews_title_search_vector_idx;
+DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger ON reviews_title;
+DROP FUNCTION IF EXISTS reviews_title_search_vector_update();
+"""
+
+
+def run_on_postgres(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            run_on_postgres(POSTGRES_FORWARD),
+            run_on_postgres(POSTGRES_BACKWARD),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:04
+
+from django.db import migrations
+
+# В PostgreSQL DESC по умолчанию ставит NULL первыми, а сортировка
+# TitleOrderingFilter и лидербордов - последними. В SQLite NULL
+# меньше любого значения и при DESC и так оказываются в конце.
+CREATE_INDEXES = """
+CREATE INDEX title_category_rating_idx
+    ON reviews_title (category_id, rating DESC{nulls}, id);
+CREATE INDEX title_rating_idx
+    ON reviews_title (rating DESC{nulls}, id);
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS title_category_rating_idx;
+DROP INDEX IF EXISTS title_rating_idx;
+"""
+
+
+def create_indexes(apps, schema_editor):
+    nulls = (
+        ' NULLS LAST'
+        if schema_editor.connection.vendor == 'postgresql' else ''
+    )
+    for statement in CREATE_INDEXES.format(nulls=nulls).split(';')[:-1]:
+        schema_editor.execute(statement)
+
+
+def drop_indexes(apps, schema_editor):
+    for statement in DROP_INDEXES.split(';')[:-1]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_category_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_rating_idx',
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,7 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField,
+                                            TrigramSimilarity)
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import connections, models
+from django.db.models import (Avg, Count, DecimalField, F, OuterRef, Subquery,
+                              Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
@@ -9,6 +14,9 @@ from .validators import validate_year
 
 User = get_user_model()
 
+# Конфигурация полнотекстового поиска, как в триггере из миграции 0004.
+SEARCH_CONFIG = 'simple'
+
 
 class Category(models.Model):
     name = models.CharField(
@@ -48,7 +56,156 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class TitleQuerySet(models.QuerySet):
+    def with_relations(self):
+        """Подгружает категорию и жанры, чтобы избежать N+1 запросов."""
+        return self.select_related('category').prefetch_related('genre')
+
+    def search(self, value):
+        """
+        Поиск по названию и описанию, лучшие совпадения первыми.
+        В PostgreSQL - полнотекстовый поиск по search_vector и
+        триграммное сходство названия, в остальных базах - icontains.
+        Оба условия PostgreSQL проверяются по GIN-индексам; сходство
+        вычисляется только для найденных строк, для сортировки. Порог
+        оператора % - pg_trgm.similarity_threshold, по умолчанию 0.3.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                models.Q(name__icontains=value)
+                | models.Q(description__icontains=value)
+            ).annotate(
+                rank=models.Case(
+                    models.When(name__icontains=value, then=1),
+                    default=0,
+                    output_field=models.IntegerField(),
+                )
+            ).order_by('-rank', 'id')
+        query = SearchQuery(value, config=SEARCH_CONFIG, search_type='plain')
+        return self.filter(
+            models.Q(search_vector=query)
+            | models.Q(name__trigram_similar=value)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramSimilarity('name', value),
+        ).order_by('-rank', '-similarity', 'id')
+
+    def recompute_ratings(self):
+        """Пересчитывает сумму оценок, число отзывов и рейтинг одним UPDATE."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            rating=Round(
+                Subquery(reviews.annotate(avg=Avg('score')).values('avg'))
+            ),
+        )
+
+    def with_counter_drift(self):
+        """Произведения, у которых счётчики разошлись с отзывами."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.annotate(
+            actual_score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            actual_review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+        ).exclude(
+            score_sum=F('actual_score_sum'),
+            review_count=F('actual_review_count'),
+        )
+
+
+class ReviewQuerySet(models.QuerySet):
+    def actual_comments_count(self):
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review')
+        return Coalesce(
+            Subquery(comments.annotate(total=Count('pk')).values('total')), 0
+        )
+
+    def recompute_comment_counts(self):
+        """Пересчитывает число комментариев к отзывам одним UPDATE."""
+        return self.update(comments_count=self.actual_comments_count())
+
+    def with_counter_drift(self):
+        """Отзывы, у которых счётчик разошёлся с комментариями."""
+        return self.annotate(
+            actual_comments_count=self.actual_comments_count()
+        ).exclude(comments_count=F('actual_comments_count'))
+
+
+class NumericCast(Cast):
+    """
+    Приведение к numeric. ROUND(numeric) в PostgreSQL округляет половины
+    от нуля, как ROUND(AVG(int)) в recompute_ratings; ROUND(double
+    precision) - обычно к чётному. В SQLite decimal даёт целочисленное
+    деление, поэтому там число приводится к REAL, ROUND(REAL) округляет
+    половины от нуля.
+    """
+
+    def __init__(self, expression):
+        super().__init__(
+            expression, DecimalField(max_digits=12, decimal_places=0)
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(%(expressions)s AS REAL)', **extra_context
+        )
+
+
+def rating_expression(score_delta=0, count_delta=0):
+    """Рейтинг по текущим счётчикам произведения с учётом изменений."""
+    return Round(
+        NumericCast(F('score_sum') + score_delta)
+        / NullIf(F('review_count') + count_delta, 0),
+        output_field=models.IntegerField()
+    )
+
+
+class CounterFieldsMixin:
+    """
+    Счётчики из counter_fields меняются только UPDATE с F()-выражениями.
+    Сохранение уже существующего объекта их не пишет, чтобы загруженные
+    ранее значения не затёрли конкурентные изменения.
+    """
+    counter_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if update_fields is None and not (force_insert or self._state.adding):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
+
+
+class Title(CounterFieldsMixin, models.Model):
     name = models.CharField(
         verbose_name='Название произведения',
         max_length=256,
@@ -88,16 +245,51 @@ class Title(models.Model):
             MaxValueValidator(10)
         )
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    # В PostgreSQL заполняется триггером по name и description.
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    counter_fields = ('rating', 'score_sum', 'review_count')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+            # Под ?ordering=-reviews_count, id - дополнительный ключ
+            # сортировки TitleOrderingFilter. Индексы по rating DESC
+            # NULLS LAST для ?ordering=-rating и /titles/top/ создаёт
+            # миграция 0008: Index в Django 2.2 не задаёт NULLS LAST.
+            models.Index(
+                fields=('-review_count', 'id'),
+                name='title_review_count_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Review(models.Model):
+class Review(CounterFieldsMixin, models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -127,11 +319,26 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = ReviewQuerySet.as_manager()
+
+    counter_fields = ('comments_count',)
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('title', 'author'),
@@ -141,15 +348,41 @@ class Review(models.Model):
                 name='score_limit'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
-@receiver([post_save, post_delete], sender=Review)
-def update_rating(sender, instance, **kwargs):
-    title = instance.title
-    rating = title.reviews.aggregate(
-        rating=Avg('score')
-    ).get('rating')
-    title.rating = round(rating) if rating else None
-    title.save()
+def update_title_counters(title_id, score_delta, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        review_count=F('review_count') + count_delta,
+        rating=rating_expression(score_delta, count_delta),
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating(sender, instance, created, **kwargs):
+    if created:
+        update_title_counters(instance.title_id, instance.score, 1)
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        if loaded_score is None:
+            # Прежняя оценка неизвестна - пересчитываем произведение целиком.
+            Title.objects.filter(pk=instance.title_id).recompute_ratings()
+        elif instance.score != loaded_score:
+            update_title_counters(
+                instance.title_id, instance.score - loaded_score, 0
+            )
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    score = getattr(instance, '_loaded_score', None) or instance.score
+    update_title_counters(instance.title_id, -score, -1)
 
 
 class Comment(models.Model):
@@ -178,4 +411,27 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+def update_comments_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        update_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    update_comments_count(instance.review_id, -1)
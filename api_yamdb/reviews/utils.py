@@ -0,0 +1,22 @@
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def chunked(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности первичных ключей после вставки с id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
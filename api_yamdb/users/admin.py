@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from .models import OutgoingEmail
+
 User = get_user_model()
 
 
@@ -18,4 +20,18 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'send_after',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+
+
 admin.site.register(User, UserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
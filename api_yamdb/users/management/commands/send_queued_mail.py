@@ -0,0 +1,129 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import FAILED, SENT, OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails in batches over one connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to sleep between polls of an empty queue',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = self.send_batch(
+                options['batch_size'], options['max_attempts']
+            )
+            if sent:
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def send_batch(self, batch_size, max_attempts):
+        messages = self.claim(batch_size)
+        if not messages:
+            return 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            # Сервер недоступен: вся пачка откладывается, как при
+            # ошибке отправки, и --loop не перезапускается в цикле.
+            for message in messages:
+                self.retry_later(message, error, max_attempts)
+            OutgoingEmail.objects.bulk_update(
+                messages, ('status', 'send_after', 'last_error')
+            )
+        else:
+            try:
+                for message in messages:
+                    self.send(connection, message, max_attempts)
+            finally:
+                connection.close()
+        sent = sum(message.status == SENT for message in messages)
+        self.stdout.write(f'Sent {sent} of {len(messages)} emails')
+        return len(messages)
+
+    @staticmethod
+    def claim(batch_size):
+        """Берёт пачку в короткой транзакции, до обращения к SMTP.
+
+        Попытка засчитывается сразу, а send_after сдвигается на срок
+        аренды: блокировка строк не держится на время отправки, и другие
+        воркеры пачку не видят. После падения воркера письма вернутся в
+        очередь по истечении EMAIL_QUEUE_LEASE.
+        """
+        with transaction.atomic():
+            messages = list(
+                OutgoingEmail.objects.due()
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            lease_until = timezone.now() + timedelta(
+                seconds=settings.EMAIL_QUEUE_LEASE
+            )
+            for message in messages:
+                message.attempts += 1
+                message.send_after = lease_until
+            OutgoingEmail.objects.bulk_update(
+                messages, ('attempts', 'send_after')
+            )
+        return messages
+
+    def send(self, connection, message, max_attempts):
+        try:
+            connection.send_messages([EmailMessage(
+                message.subject,
+                message.body,
+                message.from_email,
+                [message.recipient],
+                connection=connection,
+            )])
+        except Exception as error:
+            self.retry_later(message, error, max_attempts)
+            update_fields = ('status', 'send_after', 'last_error')
+        else:
+            message.status = SENT
+            message.sent_at = timezone.now()
+            update_fields = ('status', 'sent_at')
+        # Результат пишется сразу после письма: упавший посреди пачки
+        # воркер не отправит доставленные письма второй раз.
+        message.save(update_fields=update_fields)
+
+    @staticmethod
+    def retry_later(message, error, max_attempts):
+        message.last_error = repr(error)
+        if message.attempts >= max_attempts:
+            message.status = FAILED
+        else:
+            message.send_after = timezone.now() + timedelta(
+                seconds=settings.EMAIL_QUEUE_RETRY_DELAY
+                * 2 ** (message.attempts - 1)
+            )
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.tokens import default_token_generator
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -14,6 +15,16 @@ ROLE_CHOICES = [
     (MODERATOR, MODERATOR),
 ]
 
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+EMAIL_STATUS_CHOICES = [
+    (PENDING, PENDING),
+    (SENT, SENT),
+    (FAILED, FAILED),
+]
+
 
 class User(AbstractUser):
     username = models.CharField(
@@ -72,6 +83,28 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = (
+            instance.__dict__.get('role'),
+            instance.__dict__.get('is_active'),
+        )
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    @property
+    def access_changed(self):
+        """Роль или активность изменились с момента загрузки."""
+        loaded = getattr(self, '_loaded_access', None)
+        return loaded is not None and loaded != (self.role, self.is_active)
+
+    @property
+    def username_changed(self):
+        """Имя изменилось с момента загрузки или не было загружено."""
+        loaded = getattr(self, '_loaded_username', None)
+        return loaded is None or loaded != self.username
+
     def save(self, *args, **kwargs):
         if self.role in (MODERATOR, ADMIN):
             self.is_staff = True
@@ -87,3 +120,50 @@ class User(AbstractUser):
         ordering = ('id',)
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+    def enqueue(self, subject, body, from_email, recipient):
+        return self.create(
+            subject=subject,
+            body=body,
+            from_email=from_email,
+            recipient=recipient,
+        )
+
+    def due(self):
+        return self.filter(status=PENDING, send_after__lte=timezone.now())
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        max_length=20,
+        choices=EMAIL_STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    send_after = models.DateTimeField('Отправить после', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True, default='')
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('send_after', 'id')
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=('status', 'send_after'),
+                name='outgoing_email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'